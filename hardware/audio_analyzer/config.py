@@ -16,6 +16,10 @@ class AudioConfig:
     detection_window: float = 1.5  # seconds - matches the paper
     hop_length: float = 0.5  # seconds - how often to run detection
 
+    # Energy gate: CoughDetectionPipeline.predict skips both models for
+    # windows whose RMS is below this (0 disables the gate)
+    energy_gate_threshold: float = 0.01
+
 
 @dataclass
 class MFCCConfig:
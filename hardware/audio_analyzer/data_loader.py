@@ -2,16 +2,24 @@
 Data loading and preparation utilities for cough detection training
 """
 import os
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import librosa
 import tensorflow as tf
 from pathlib import Path
 from typing import Tuple, List, Optional, Dict
-from sklearn.model_selection import train_test_split
 import json
+from dataclasses import asdict
+
+# orjson is optional; it only speeds up reading/writing large split files
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from config import audio_config, data_config, mfcc_config
-from feature_extraction import MFCCExtractor, AudioPreprocessor
+from feature_extraction import MFCCExtractor, TFMFCCExtractor, AudioPreprocessor, load_audio_file
 
 
 class CoughDataset:
@@ -37,14 +45,27 @@ class CoughDataset:
         data_dir: str,
         window_size: float = 1.5,
         sample_rate: int = 8000,
-        use_augmentation: bool = True
+        use_augmentation: bool = True,
+        cache_dir: Optional[str] = None
     ):
         self.data_dir = Path(data_dir)
         self.window_size = window_size
         self.sample_rate = sample_rate
         self.use_augmentation = use_augmentation
 
+        # When set, non-augmented datasets read MFCCs precomputed into this
+        # directory and augmented ones read packed audio from it, instead
+        # of decoding every WAV each epoch
+        self.cache_dir = cache_dir
+        self._feature_cache = None
+        self._packed_audio = None
+
+        # One Generator per tf.data worker thread instead of the global,
+        # lock-protected legacy RNG
+        self._rng = threading.local()
+
         self.extractor = MFCCExtractor()
+        self.tf_extractor = TFMFCCExtractor(int(window_size * sample_rate), sr=sample_rate)
         self.preprocessor = AudioPreprocessor(sr=sample_rate)
 
         self.audio_files = []
@@ -59,8 +80,10 @@ class CoughDataset:
         if not self.data_dir.exists():
             raise ValueError(f"Data directory does not exist: {self.data_dir}")
 
-        # Get all subdirectories (each represents a class)
-        class_dirs = [d for d in self.data_dir.iterdir() if d.is_dir()]
+        # Get all subdirectories (each represents a class). scandir entries
+        # carry their type, so no extra stat or Path object per entry
+        with os.scandir(self.data_dir) as it:
+            class_dirs = [entry for entry in it if entry.is_dir()]
 
         if len(class_dirs) == 0:
             raise ValueError(f"No class directories found in {self.data_dir}")
@@ -68,18 +91,24 @@ class CoughDataset:
         # Sort for consistent labeling
         class_dirs = sorted(class_dirs, key=lambda x: x.name)
 
-        # Create label mappings
-        for idx, class_dir in enumerate(class_dirs):
+        def scan_class_dir(class_dir) -> List[str]:
+            # *.wav in directory order, extension matched case-insensitively
+            # (as glob does on Windows) so *.WAV clips are not dropped
+            with os.scandir(class_dir.path) as it:
+                return [entry.path for entry in it if entry.name.lower().endswith('.wav')]
+
+        # Listing is I/O bound, so scan the class directories concurrently
+        with ThreadPoolExecutor(max_workers=min(32, len(class_dirs))) as executor:
+            class_files = list(executor.map(scan_class_dir, class_dirs))
+
+        # Create label mappings (in sorted class order, whatever finished first)
+        for idx, (class_dir, wav_files) in enumerate(zip(class_dirs, class_files)):
             class_name = class_dir.name
             self.label_to_name[idx] = class_name
             self.name_to_label[class_name] = idx
 
-            # Find all WAV files in this class
-            wav_files = list(class_dir.glob("*.wav"))
-
-            for wav_file in wav_files:
-                self.audio_files.append(str(wav_file))
-                self.labels.append(idx)
+            self.audio_files.extend(wav_files)
+            self.labels.extend([idx] * len(wav_files))
 
         if len(self.audio_files) == 0:
             raise FileNotFoundError(
@@ -87,13 +116,34 @@ class CoughDataset:
                 f"Please ensure your dataset is populated correctly. You may need to run a download script."
             )
 
+        # Contiguous arrays so labels and paths can be gathered by index
+        self.audio_files = np.asarray(self.audio_files)
+        self.labels = np.asarray(self.labels, dtype=np.int32)
+
         print(f"Found {len(self.audio_files)} audio files across {len(class_dirs)} classes")
         print(f"Classes: {self.label_to_name}")
 
-    def load_audio(self, file_path: str) -> np.ndarray:
-        """Load and preprocess a single audio file."""
+    def _thread_rng(self) -> np.random.Generator:
+        """Return the calling thread's random generator."""
+        rng = getattr(self._rng, 'rng', None)
+        if rng is None:
+            rng = self._rng.rng = np.random.default_rng()
+        return rng
+
+    def load_audio(self, file_path: str, random_crop: Optional[bool] = None) -> np.ndarray:
+        """
+        Load and preprocess a single audio file.
+
+        Args:
+            file_path: Path to the WAV file (or a file-like object)
+            random_crop: Random crop instead of center crop for long clips
+                (defaults to use_augmentation)
+        """
+        if random_crop is None:
+            random_crop = self.use_augmentation
+
         # Load audio
-        audio, sr = librosa.load(file_path, sr=self.sample_rate, mono=True)
+        audio = load_audio_file(file_path, sr=self.sample_rate)
 
         # Calculate expected length
         expected_length = int(self.window_size * self.sample_rate)
@@ -103,85 +153,336 @@ class CoughDataset:
             audio = np.pad(audio, (0, expected_length - len(audio)))
         elif len(audio) > expected_length:
             # Random crop for training, center crop for validation
-            if self.use_augmentation:
-                start = np.random.randint(0, len(audio) - expected_length)
+            if random_crop:
+                start = self._thread_rng().integers(0, len(audio) - expected_length)
             else:
                 start = (len(audio) - expected_length) // 2
             audio = audio[start:start + expected_length]
 
         return audio
 
-    def create_tf_dataset(
+    def _cached_array(
         self,
-        file_indices: List[int],
-        batch_size: int = 32,
-        shuffle: bool = True,
-        augment: bool = True
-    ) -> tf.data.Dataset:
+        cache_dir: str,
+        name: str,
+        row_shape: tuple,
+        dtype,
+        compute_row,
+        params: Optional[dict] = None
+    ) -> np.ndarray:
         """
-        Create TensorFlow dataset from file indices.
+        Load a per-file array cache, (re)building it when it is stale.
+
+        The array is stored as <name>.npy next to a manifest of the source
+        files, their modification times, shape, dtype and any extraction
+        parameters; the cache is reused while all of those match, so editing
+        a WAV or changing the MFCC config triggers a rebuild.
 
         Args:
-            file_indices: Indices of files to include
-            batch_size: Batch size
-            shuffle: Whether to shuffle
-            augment: Whether to apply data augmentation
+            cache_dir: Directory holding the cache
+            name: Base file name of the cache
+            row_shape: Shape of the entry for a single file
+            dtype: Storage dtype
+            compute_row: Function mapping a file path to its entry
+            params: Extra settings the cached values depend on
 
         Returns:
-            tf.data.Dataset
+            Read-only memory map of shape (n_files, *row_shape)
         """
+        os.makedirs(cache_dir, exist_ok=True)
+        array_path = os.path.join(cache_dir, f'{name}.npy')
+        manifest_path = os.path.join(cache_dir, f'{name}_manifest.json')
+
+        manifest = {
+            'files': self.audio_files.tolist(),
+            'mtimes': [os.path.getmtime(path) for path in self.audio_files],
+            'shape': [len(self.audio_files), *row_shape],
+            'dtype': np.dtype(dtype).name,
+            'params': params or {}
+        }
+        # Compare in JSON form (tuples become lists)
+        manifest = json.loads(json.dumps(manifest))
+
+        if os.path.exists(array_path) and os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as f:
+                if json.load(f) == manifest:
+                    print(f"Using cached {name} from {array_path}")
+                    return np.load(array_path, mmap_mode='r')
+
+        print(f"Precomputing {name} for {len(self.audio_files)} files...")
+        array = np.lib.format.open_memmap(
+            array_path,
+            mode='w+',
+            dtype=dtype,
+            shape=tuple(manifest['shape'])
+        )
+        for i, file_path in enumerate(self.audio_files):
+            array[i] = compute_row(file_path)
+        array.flush()
+        del array
+
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+        print(f"Cached {name} to {array_path}")
+
+        return np.load(array_path, mmap_mode='r')
 
-        def load_and_preprocess(idx):
-            """Load audio, extract features, return (features, label)."""
-            idx = int(idx)
-            file_path = self.audio_files[idx]
-            label = self.labels[idx]
+    def precompute_features(self, cache_dir: str) -> np.ndarray:
+        """
+        Extract center-cropped, normalized MFCCs for every file once.
 
-            # Load audio
-            audio = self.load_audio(file_path)
+        Normalized MFCCs stay within a few units of zero, so they are stored
+        as float16 to halve the cache size and read bandwidth.
 
-            # Apply augmentation if enabled
-            if augment and self.use_augmentation:
-                audio = self.preprocessor.augment(audio)
+        Args:
+            cache_dir: Directory to store the feature cache in
 
-            # Extract MFCC features
-            features = self.extractor.extract_normalized(audio, sr=self.sample_rate)
+        Returns:
+            Read-only memory map of shape (n_files, n_features, n_frames)
+        """
+        return self._cached_array(
+            cache_dir,
+            'mfcc_features',
+            mfcc_config.get_input_shape(self.window_size, self.sample_rate),
+            np.float16,
+            lambda path: self.extractor.extract_normalized(
+                self.load_audio(path, random_crop=False), sr=self.sample_rate
+            ),
+            params={'sample_rate': self.sample_rate, 'mfcc': asdict(self.extractor.config)}
+        )
 
-            return features.astype(np.float32), label
+    def pack(self, cache_dir: str) -> np.ndarray:
+        """
+        Pack the center-cropped audio of every file into one float16 array.
 
-        # Create dataset from indices
-        dataset = tf.data.Dataset.from_tensor_slices(file_indices)
+        Augmented training then reads clips from a single memory map
+        instead of opening and decoding every WAV each epoch. Packed clips
+        are already cropped, so time shifting is left to the augmentation.
 
-        if shuffle:
-            dataset = dataset.shuffle(buffer_size=len(file_indices))
+        Args:
+            cache_dir: Directory to store the packed audio in
 
-        # Map loading function
-        dataset = dataset.map(
-            lambda idx: tf.py_function(
-                load_and_preprocess,
-                [idx],
-                [tf.float32, tf.int32]
-            ),
-            num_parallel_calls=tf.data.AUTOTUNE
+        Returns:
+            Read-only memory map of shape (n_files, window_size * sample_rate)
+        """
+        return self._cached_array(
+            cache_dir,
+            'audio_f16',
+            (int(self.window_size * self.sample_rate),),
+            np.float16,
+            lambda path: self.load_audio(path, random_crop=False),
+            params={'sample_rate': self.sample_rate}
         )
 
-        # Set shapes (TensorFlow needs explicit shapes after py_function)
+    @staticmethod
+    def _dataset_options(deterministic: bool) -> tf.data.Options:
+        """tf.data options shared by all pipelines built here."""
+        options = tf.data.Options()
+        # Element order only matters when it is not shuffled anyway
+        options.deterministic = deterministic
+        options.autotune.enabled = True
+        options.experimental_optimization.map_and_batch_fusion = True
+        options.experimental_optimization.map_parallelization = True
+        options.experimental_optimization.parallel_batch = True
+        # Dedicated pool so input preprocessing does not compete with the
+        # training step's inter-op threads
+        options.threading.private_threadpool_size = os.cpu_count() or 1
+        return options
+
+    @classmethod
+    def _prefetch(cls, dataset: tf.data.Dataset, deterministic: bool) -> tf.data.Dataset:
+        """Apply dataset options and prefetch, straight to the GPU when there is one."""
+        dataset = dataset.with_options(cls._dataset_options(deterministic))
+
+        # prefetch_to_device has to be the last transformation
+        if tf.config.list_physical_devices('GPU'):
+            return dataset.apply(tf.data.experimental.prefetch_to_device('/GPU:0'))
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
+    def _build_load_fn(self, augment: bool):
+        """
+        Return the per-file decode function for a dataset.
+
+        The augmentation choice is fixed when the dataset is built, so the
+        mapped function never re-checks it per sample.
+
+        Args:
+            augment: Random crop and augment (training) or center crop only
+        """
+        if augment:
+            def load_and_augment(data):
+                audio = self.load_audio(io.BytesIO(data), random_crop=True)
+                return self.preprocessor.augment(audio).astype(np.float32)
+            return load_and_augment
+
+        def load_clean(data):
+            return self.load_audio(io.BytesIO(data), random_crop=False).astype(np.float32)
+        return load_clean
+
+    def _build_features_ds(
+        self,
+        file_indices: List[int],
+        batch_size: int,
+        shuffle: bool,
+        augment: bool
+    ) -> tf.data.Dataset:
+        """
+        Build a batched (features, file index) dataset for the given files.
+
+        Labels are attached afterwards by the public dataset methods, so the
+        classification and detection datasets share everything up to here.
+        """
         input_shape = mfcc_config.get_input_shape(self.window_size, self.sample_rate)
-        dataset = dataset.map(
-            lambda x, y: (
-                tf.ensure_shape(x, input_shape),
-                tf.ensure_shape(y, [])
+        file_indices = np.asarray(file_indices, dtype=np.int64)
+
+        # Augmentation needs the raw audio, so only clean datasets use the cache
+        if self.cache_dir is not None and not (augment and self.use_augmentation):
+            if self._feature_cache is None:
+                self._feature_cache = self.precompute_features(self.cache_dir)
+            features = self._feature_cache
+
+            dataset = tf.data.Dataset.from_tensor_slices(file_indices)
+            if shuffle:
+                dataset = dataset.shuffle(buffer_size=len(file_indices))
+
+            # Gather a whole batch from the memory map per call
+            dataset = dataset.batch(batch_size, drop_remainder=shuffle)
+            dataset = dataset.map(
+                lambda idx: (
+                    tf.cast(
+                        tf.ensure_shape(
+                            tf.numpy_function(lambda i: features[i], [idx], tf.float16),
+                            (None, *input_shape)
+                        ),
+                        tf.float32
+                    ),
+                    idx
+                ),
+                num_parallel_calls=tf.data.AUTOTUNE
+            )
+            return dataset
+
+        expected_length = int(self.window_size * self.sample_rate)
+
+        if self.cache_dir is not None:
+            # Augment clips from the packed audio instead of the WAV files
+            if self._packed_audio is None:
+                self._packed_audio = self.pack(self.cache_dir)
+            packed = self._packed_audio
+
+            def load_and_preprocess(idx):
+                audio = packed[idx].astype(np.float32)
+                return self.preprocessor.augment(audio).astype(np.float32)
+
+            dataset = tf.data.Dataset.from_tensor_slices((file_indices, file_indices))
+            if shuffle:
+                dataset = dataset.shuffle(buffer_size=len(file_indices))
+        else:
+            load_and_preprocess = self._build_load_fn(augment and self.use_augmentation)
+
+            # Create dataset from (path, index) pairs
+            paths = self.audio_files[file_indices]
+            dataset = tf.data.Dataset.from_tensor_slices((paths, file_indices))
+
+            if shuffle:
+                dataset = dataset.shuffle(buffer_size=len(file_indices))
+
+            # Keep several file reads in flight instead of one at a time
+            dataset = dataset.interleave(
+                lambda path, idx: tf.data.Dataset.from_tensors((tf.io.read_file(path), idx)),
+                cycle_length=16,
+                num_parallel_calls=tf.data.AUTOTUNE,
+                deterministic=not shuffle
             )
+
+        # Only decoding (and augmentation) runs in Python per sample
+        dataset = dataset.map(
+            lambda source, idx: (
+                tf.ensure_shape(
+                    tf.numpy_function(load_and_preprocess, [source], tf.float32),
+                    [expected_length]
+                ),
+                idx
+            ),
+            num_parallel_calls=tf.data.AUTOTUNE,
+            deterministic=not shuffle
+        )
+
+        # Batch (partial batches are only kept for evaluation)
+        dataset = dataset.batch(
+            batch_size,
+            drop_remainder=shuffle,
+            num_parallel_calls=tf.data.AUTOTUNE,
+            deterministic=not shuffle
         )
 
-        # Batch
-        dataset = dataset.batch(batch_size)
+        # MFCCs for the whole batch in one set of TF ops (one batched STFT
+        # instead of many tiny ones), outside the GIL
+        dataset = dataset.map(
+            lambda audio, idx: (self.tf_extractor.extract_normalized(audio), idx),
+            num_parallel_calls=tf.data.AUTOTUNE,
+            deterministic=not shuffle
+        )
 
-        # Prefetch for performance
-        dataset = dataset.prefetch(tf.data.AUTOTUNE)
+        # Clean, unshuffled datasets (validation/test) give the same batches
+        # every epoch, so keep their features in memory after the first pass
+        if not shuffle and not (augment and self.use_augmentation):
+            dataset = dataset.cache()
 
         return dataset
 
+    def _with_labels(
+        self,
+        dataset: tf.data.Dataset,
+        labels: np.ndarray,
+        shuffle: bool,
+        one_hot_depth: Optional[int] = None
+    ) -> tf.data.Dataset:
+        """
+        Replace the file indices of a features dataset with labels and prefetch.
+
+        With one_hot_depth, labels are looked up as one-hot rows, so no
+        separate (serial) map is needed after the prefetch.
+        """
+        label_table = tf.constant(labels, dtype=tf.int32)
+        if one_hot_depth is not None:
+            label_table = tf.one_hot(label_table, depth=one_hot_depth)
+        dataset = dataset.map(
+            lambda features, idx: (features, tf.gather(label_table, idx)),
+            num_parallel_calls=tf.data.AUTOTUNE,
+            deterministic=not shuffle
+        )
+        return self._prefetch(dataset, deterministic=not shuffle)
+
+    def create_tf_dataset(
+        self,
+        file_indices: List[int],
+        batch_size: int = 32,
+        shuffle: bool = True,
+        augment: bool = True,
+        one_hot_depth: Optional[int] = None
+    ) -> tf.data.Dataset:
+        """
+        Create TensorFlow dataset from file indices.
+
+        Args:
+            file_indices: Indices of files to include
+            batch_size: Batch size
+            shuffle: Whether to shuffle
+            augment: Whether to apply data augmentation
+            one_hot_depth: If given, labels are one-hot vectors of this depth
+
+        Returns:
+            tf.data.Dataset
+        """
+        dataset = self._build_features_ds(
+            file_indices,
+            batch_size=batch_size,
+            shuffle=shuffle,
+            augment=augment
+        )
+        return self._with_labels(dataset, self.labels, shuffle, one_hot_depth=one_hot_depth)
+
     def split_data(
         self,
         train_ratio: float = 0.7,
@@ -196,24 +497,29 @@ class CoughDataset:
         """
         assert abs(train_ratio + val_ratio + test_ratio - 1.0) < 1e-6
 
-        indices = np.arange(len(self.audio_files))
+        labels = self.labels
+        rng = np.random.default_rng(random_seed)
 
-        # First split: train vs (val + test)
-        train_idx, temp_idx = train_test_split(
-            indices,
-            test_size=(1 - train_ratio),
-            random_state=random_seed,
-            stratify=self.labels
-        )
+        # Group indices by class: order[starts[c]:starts[c + 1]] are class c
+        order = np.argsort(labels, kind='stable')
+        starts = np.concatenate(([0], np.cumsum(np.bincount(labels))))
 
-        # Second split: val vs test
-        val_ratio_adjusted = val_ratio / (val_ratio + test_ratio)
-        val_idx, test_idx = train_test_split(
-            temp_idx,
-            test_size=(1 - val_ratio_adjusted),
-            random_state=random_seed,
-            stratify=[self.labels[i] for i in temp_idx]
-        )
+        train_parts, val_parts, test_parts = [], [], []
+        for c in range(len(starts) - 1):
+            class_idx = order[starts[c]:starts[c + 1]].copy()
+            rng.shuffle(class_idx)
+
+            n = len(class_idx)
+            n_train = int(round(train_ratio * n))
+            n_val = int(round(val_ratio * n))
+            train_parts.append(class_idx[:n_train])
+            val_parts.append(class_idx[n_train:n_train + n_val])
+            test_parts.append(class_idx[n_train + n_val:])
+
+        # Mix classes within each split
+        train_idx = rng.permutation(np.concatenate(train_parts))
+        val_idx = rng.permutation(np.concatenate(val_parts))
+        test_idx = rng.permutation(np.concatenate(test_parts))
 
         splits = {
             'train': train_idx.tolist(),
@@ -227,14 +533,22 @@ class CoughDataset:
 
     def save_splits(self, splits: Dict[str, List[int]], output_path: str):
         """Save data splits to JSON file."""
-        with open(output_path, 'w') as f:
-            json.dump(splits, f, indent=2)
+        if orjson is not None:
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(splits, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_path, 'w') as f:
+                json.dump(splits, f, indent=2)
         print(f"Splits saved to {output_path}")
 
     def load_splits(self, input_path: str) -> Dict[str, List[int]]:
         """Load data splits from JSON file."""
-        with open(input_path, 'r') as f:
-            splits = json.load(f)
+        if orjson is not None:
+            with open(input_path, 'rb') as f:
+                splits = orjson.loads(f.read())
+        else:
+            with open(input_path, 'r') as f:
+                splits = json.load(f)
         print(f"Splits loaded from {input_path}")
         return splits
 
@@ -255,18 +569,15 @@ class DetectionDatasetConverter:
 
         Assumes 'non_cough' directory exists and all others are cough types.
         """
-        binary_labels = []
-
-        for label in self.dataset.labels:
-            class_name = self.dataset.label_to_name[label]
-
-            # Only classes containing 'cough' are the positive class (1)
-            if 'cough' in class_name.lower():
-                binary_labels.append(1)
-            else:
-                binary_labels.append(0)
+        # One string check per class, then a single gather over all files.
+        # Only classes containing 'cough' are the positive class (1)
+        names = self.dataset.label_to_name
+        is_cough = np.array(
+            [int('cough' in names[i].lower()) for i in range(len(names))],
+            dtype=np.int32
+        )
 
-        return np.array(binary_labels)
+        return is_cough[self.dataset.labels]
 
     def create_detection_dataset(
         self,
@@ -277,54 +588,13 @@ class DetectionDatasetConverter:
     ) -> tf.data.Dataset:
         """Create dataset for binary detection training."""
 
-        binary_labels = self.get_binary_labels()
-
-        def load_and_preprocess(idx):
-            """Load audio and return binary label."""
-            idx = int(idx)
-            file_path = self.dataset.audio_files[idx]
-            label = binary_labels[idx]
-
-            # Load audio
-            audio = self.dataset.load_audio(file_path)
-
-            # Apply augmentation if enabled
-            if augment and self.dataset.use_augmentation:
-                audio = self.dataset.preprocessor.augment(audio)
-
-            # Extract MFCC features
-            features = self.dataset.extractor.extract_normalized(audio, sr=self.dataset.sample_rate)
-
-            return features.astype(np.float32), np.int32(label)
-
-        # Create dataset
-        dataset = tf.data.Dataset.from_tensor_slices(file_indices)
-
-        if shuffle:
-            dataset = dataset.shuffle(buffer_size=len(file_indices))
-
-        dataset = dataset.map(
-            lambda idx: tf.py_function(
-                load_and_preprocess,
-                [idx],
-                [tf.float32, tf.int32]
-            ),
-            num_parallel_calls=tf.data.AUTOTUNE
+        dataset = self.dataset._build_features_ds(
+            file_indices,
+            batch_size=batch_size,
+            shuffle=shuffle,
+            augment=augment
         )
-
-        # Set shapes
-        input_shape = mfcc_config.get_input_shape(self.dataset.window_size, self.dataset.sample_rate)
-        dataset = dataset.map(
-            lambda x, y: (
-                tf.ensure_shape(x, input_shape),
-                tf.ensure_shape(y, [])
-            )
-        )
-
-        dataset = dataset.batch(batch_size)
-        dataset = dataset.prefetch(tf.data.AUTOTUNE)
-
-        return dataset
+        return self.dataset._with_labels(dataset, self.get_binary_labels(), shuffle)
 
 
 # Test the data loader
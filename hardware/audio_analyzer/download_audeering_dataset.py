@@ -8,6 +8,7 @@ import os
 import shutil
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import argparse
 
 try:
@@ -19,11 +20,39 @@ except ImportError:
     exit(1)
 
 
+def infer_label(file: str) -> str:
+    """Infer a file's label from its path, as db.get() is unreliable."""
+    path_lower = str(file).lower()
+    if 'cough' in path_lower:
+        return 'cough'
+    elif 'speech' in path_lower or 'speak' in path_lower:
+        return 'speech'
+    elif 'sneeze' in path_lower:
+        return 'sneeze'
+    elif 'silence' in path_lower or 'noise' in path_lower:
+        return 'silence'
+    return 'unknown'
+
+
+def link_or_copy(src: str, dst: Path):
+    """
+    Hardlink src to dst, copying only when linking is not possible.
+
+    The audb cache and the output directory usually live on the same
+    filesystem, where a link avoids duplicating the dataset on disk.
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
 def download_audeering_dataset(
     output_dir: str = "hardware/AI/cough_dataset",
     version: str = None,
     sampling_rate: int = 16000,
-    verbose: bool = True
+    verbose: bool = True,
+    max_workers: int = 16
 ):
     """
     Download Cough-Speech-Sneeze dataset from audEERING.
@@ -33,6 +62,7 @@ def download_audeering_dataset(
         version: Specific version to download (None = latest)
         sampling_rate: Target sampling rate (8000, 16000, or 44100)
         verbose: Print progress information
+        max_workers: Number of threads copying files out of the audb cache
     """
     print("=" * 70)
     print("DOWNLOADING COUGH-SPEECH-SNEEZE DATASET")
@@ -103,6 +133,10 @@ def download_audeering_dataset(
         print("=" * 70)
 
         files = db.files
+
+        # audb.load already put every media file in the cache, relative to
+        # db.root, so there is no need to resolve them one by one
+        db_root = db.root
         print(f"Total files: {len(files)}")
 
         # Organize into categories
@@ -126,68 +160,59 @@ def download_audeering_dataset(
 
         # Get labels/metadata from the database
         stats = defaultdict(int)
-        
-        print("Processing files from cache...")
+
+        # Decide every destination up front so the copy threads never race
+        # on duplicate file names. Names already on disk are listed once per
+        # directory and a per-name counter picks the next free suffix, so no
+        # stat calls are made per candidate.
+        taken = {d: set(os.listdir(d)) for d in categories.values()}
+        name_counts = defaultdict(int)
+        jobs = []
         for file in files:
+            label = infer_label(file)
+
+            # Map label to category directory
+            if label not in categories:
+                if verbose:
+                    print(f"Warning: Unknown label '{label}' for file {file}, skipping...")
+                stats['skipped'] += 1
+                continue
+
+            dest_dir = categories[label]
+            name = Path(file).name
+            stem, suffix = os.path.splitext(name)
+
+            # Handle duplicate filenames
+            key = (dest_dir, name)
+            counter = name_counts[key]
+            candidate = name if counter == 0 else f"{stem}_{counter}{suffix}"
+            while candidate in taken[dest_dir]:
+                counter += 1
+                candidate = f"{stem}_{counter}{suffix}"
+            name_counts[key] = counter + 1
+
+            taken[dest_dir].add(candidate)
+            jobs.append((file, dest_dir / candidate))
+
+        def process(job):
+            """Link one file out of the audb cache; returns its stats key."""
+            file, dest_file = job
             try:
-                # Use audb.load_media to get the absolute path to the cached file.
-                file_path = audb.load_media(
-                    dataset_name, 
-                    file, 
-                    version=version, 
-                    format='wav', 
-                    sampling_rate=sampling_rate,
-                    verbose=False # Reduce noise
-                )
-
-                # Infer label from filename/path, as db.get() is unreliable
-                path_lower = str(file).lower()
-                if 'cough' in path_lower:
-                    label = 'cough'
-                elif 'speech' in path_lower or 'speak' in path_lower:
-                    label = 'speech'
-                elif 'sneeze' in path_lower:
-                    label = 'sneeze'
-                elif 'silence' in path_lower or 'noise' in path_lower:
-                    label = 'silence'
-                else:
-                    label = 'unknown'
-
-                # Map label to category directory
-                if label in categories:
-                    dest_dir = categories[label]
-                else:
-                    if verbose:
-                        print(f"Warning: Unknown label '{label}' for file {file}, skipping...")
-                    stats['skipped'] += 1
-                    continue
-
-                # Copy file
-                dest_file = dest_dir / Path(file).name
-
-                # Handle duplicate filenames
-                if dest_file.exists():
-                    stem = dest_file.stem
-                    suffix = dest_file.suffix
-                    counter = 1
-                    while dest_file.exists():
-                        dest_file = dest_dir / f"{stem}_{counter}{suffix}"
-                        counter += 1
-
-                shutil.copy2(file_path, dest_file)
-
-                # Update stats
-                category_name = dest_dir.name
+                link_or_copy(os.path.join(db_root, file), dest_file)
+                return dest_file.parent.name
+            except Exception as e:
+                if verbose:
+                    print(f"Error processing file {file}: {e}")
+                return 'errors'
+
+        print(f"Processing files from cache with {max_workers} workers...")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for category_name in executor.map(process, jobs):
                 stats[category_name] += 1
 
                 if verbose and sum(stats.values()) % 200 == 0:
                     print(f"  Processed {sum(stats.values())} files...")
 
-            except Exception as e:
-                if verbose:
-                    print(f"Error processing file {file}: {e}")
-                stats['errors'] += 1
-
         # Print statistics
         print("\n" + "=" * 70)
         print("ORGANIZATION COMPLETE")
@@ -244,6 +269,12 @@ def main():
         choices=[8000, 16000, 44100],
         help='Target sampling rate'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=16,
+        help='Number of parallel copy threads'
+    )
     parser.add_argument(
         '--quiet',
         action='store_true',
@@ -256,7 +287,8 @@ def main():
         output_dir=args.output_dir,
         version=args.version,
         sampling_rate=args.sampling_rate,
-        verbose=not args.quiet
+        verbose=not args.quiet,
+        max_workers=args.workers
     )
 
     if success:
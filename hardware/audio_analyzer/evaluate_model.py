@@ -1,39 +1,47 @@
 """
 Evaluate trained models on validation or test datasets.
 
-This script loads a trained .h5 model and evaluates it on a specified dataset split.
+This script loads a trained Keras model (.keras or .h5) and evaluates it on a specified dataset split.
+
+TensorFlow, scikit-learn and matplotlib are imported inside the functions that
+use them, so the CLI (e.g. --help, argument errors) starts without paying for
+them.
 """
 import os
 import argparse
+import functools
 import numpy as np
-import tensorflow as tf
-
-# Handle Keras import for different TensorFlow versions
-try:
-    from tensorflow import keras
-    from tensorflow.keras import models
-except (ImportError, AttributeError):
-    import keras
-    from keras import models
-
-from sklearn.metrics import (
-    classification_report,
-    confusion_matrix,
-    accuracy_score,
-    precision_recall_fscore_support
-)
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-from data_loader import CoughDataset, DetectionDatasetConverter
+from typing import Optional, Tuple
+
 from config import audio_config
 
 
 def load_model(model_path: str):
-    """Load a trained Keras model from .h5 file."""
+    """
+    Load a trained Keras model from a .keras or .h5 file (a missing .keras
+    path falls back to an .h5 of the same name and vice versa).
+
+    Loaded models are memoized by real path and modification time, so
+    evaluating several splits in one process only deserializes each file once.
+    """
+    from models import resolve_model_path
+
+    model_path = resolve_model_path(model_path)
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"Model not found: {model_path}")
 
+    return _load_model_cached(os.path.realpath(model_path), os.path.getmtime(model_path))
+
+
+@functools.lru_cache(maxsize=4)
+def _load_model_cached(model_path: str, mtime: float):
+    """Load a model; mtime is only part of the cache key."""
+    # Handle Keras import for different TensorFlow versions
+    try:
+        from tensorflow.keras import models
+    except (ImportError, AttributeError):
+        from keras import models
+
     print(f"Loading model from {model_path}...")
     model = models.load_model(model_path)
     print(f"✓ Model loaded successfully!")
@@ -43,23 +51,134 @@ def load_model(model_path: str):
     return model
 
 
+@functools.lru_cache(maxsize=4)
+def make_predict_fn(model, jit_compile: bool = True):
+    """
+    Build a compiled forward pass for evaluation.
+
+    Args:
+        model: Loaded Keras model
+        jit_compile: Compile with XLA
+
+    Returns:
+        tf.function mapping a feature batch to model outputs
+    """
+    import tensorflow as tf
+
+    @tf.function(
+        jit_compile=jit_compile,
+        input_signature=[tf.TensorSpec([None, *model.input_shape[1:]], tf.float32)]
+    )
+    def predict_fn(x):
+        return model(x, training=False)
+
+    return predict_fn
+
+
+def predict_dataset(model, dataset, n_samples: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run the model over a (features, labels) dataset with an XLA-compiled
+    forward pass, falling back to plain graph mode if XLA is unavailable.
+
+    Labels are collected in the same pass, so they are guaranteed to line up
+    with the predictions.
+
+    Args:
+        model: Loaded Keras model
+        dataset: Batched, unshuffled (features, labels) dataset
+        n_samples: Number of samples in the dataset
+
+    Returns:
+        y_true: Labels, shape (n_samples,)
+        y_pred_proba: Model outputs, shape (n_samples, n_outputs)
+    """
+    import tensorflow as tf
+
+    predict_fn = make_predict_fn(model)
+    y_true = np.empty(n_samples, dtype=np.int64)
+    y_pred_proba = None
+    offset = 0
+
+    for features, labels in dataset:
+        try:
+            outputs = predict_fn(features).numpy()
+        except (tf.errors.InvalidArgumentError, tf.errors.UnimplementedError, tf.errors.NotFoundError) as e:
+            print(f"⚠️  XLA compilation failed, using graph mode instead: {e}")
+            predict_fn = make_predict_fn(model, jit_compile=False)
+            outputs = predict_fn(features).numpy()
+
+        if y_pred_proba is None:
+            y_pred_proba = np.empty((n_samples, *outputs.shape[1:]), dtype=outputs.dtype)
+
+        end = offset + len(outputs)
+        y_pred_proba[offset:end] = outputs
+        y_true[offset:end] = labels.numpy()
+        offset = end
+
+    return y_true[:offset], y_pred_proba[:offset]
+
+
+def compute_confusion_matrix(y_true: np.ndarray, y_pred: np.ndarray, n_classes: int) -> np.ndarray:
+    """
+    Confusion matrix (rows: true label, columns: predicted) via one bincount.
+
+    At least n_classes x n_classes, even if some class is missing from the
+    split; grows if a label outside that range shows up.
+    """
+    y_true = np.asarray(y_true, dtype=np.int64)
+    y_pred = np.asarray(y_pred, dtype=np.int64)
+    if len(y_true) > 0:
+        n_classes = max(n_classes, int(y_true.max()) + 1, int(y_pred.max()) + 1)
+
+    idx = y_true * n_classes + y_pred
+    return np.bincount(idx, minlength=n_classes * n_classes).reshape(n_classes, n_classes)
+
+
+def plot_confusion_matrix(cm: np.ndarray, labels: list, figsize=(8, 6)):
+    """Draw an annotated confusion matrix on a new figure."""
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=figsize)
+    plt.imshow(cm, cmap='Blues')
+    plt.colorbar()
+
+    # Dark text on light cells, white text on dark cells
+    threshold = cm.max() / 2 if cm.size else 0
+    for (i, j), v in np.ndenumerate(cm):
+        plt.text(j, i, str(v), ha='center', va='center',
+                 color='white' if v > threshold else 'black')
+
+    plt.xticks(range(len(labels)), labels)
+    plt.yticks(range(len(labels)), labels)
+
+
 def evaluate_detection_model(
     model_path: str,
     data_dir: str,
     split: str = 'test',
     batch_size: int = 32,
-    save_results: bool = True
+    save_results: bool = True,
+    cache_dir: Optional[str] = None
 ):
     """
     Evaluate binary detection model (cough vs non-cough).
 
     Args:
-        model_path: Path to .h5 model file
+        model_path: Path to .keras or .h5 model file
         data_dir: Directory containing dataset
         split: Which split to evaluate ('train', 'val', or 'test')
         batch_size: Batch size for evaluation
         save_results: Whether to save confusion matrix plot
+        cache_dir: Directory for the on-disk MFCC feature cache (reused
+            across runs and splits; None recomputes features every run)
     """
+    from sklearn.metrics import (
+        classification_report,
+        accuracy_score,
+        precision_recall_fscore_support
+    )
+    from data_loader import CoughDataset, DetectionDatasetConverter
+
     print("=" * 70)
     print("EVALUATING DETECTION MODEL")
     print("=" * 70)
@@ -73,7 +192,8 @@ def evaluate_detection_model(
         data_dir=data_dir,
         window_size=1.5,
         sample_rate=audio_config.sample_rate,
-        use_augmentation=False  # No augmentation for evaluation
+        use_augmentation=False,  # No augmentation for evaluation
+        cache_dir=cache_dir
     )
 
     # Load splits
@@ -99,16 +219,12 @@ def evaluate_detection_model(
         augment=False
     )
 
-    # Get true labels
-    binary_labels = converter.get_binary_labels()
-    y_true = np.array([binary_labels[i] for i in splits[split]])
-
     # Evaluate model
     print(f"\nEvaluating on {len(splits[split])} samples...")
     print("-" * 70)
 
-    # Get predictions
-    y_pred_proba = model.predict(eval_dataset, verbose=1)
+    # Get predictions and true labels in one pass
+    y_true, y_pred_proba = predict_dataset(model, eval_dataset, len(splits[split]))
     y_pred = (y_pred_proba > 0.5).astype(int).flatten()
 
     # Calculate metrics
@@ -133,12 +249,13 @@ def evaluate_detection_model(
     print(classification_report(
         y_true,
         y_pred,
+        labels=[0, 1],
         target_names=['Non-Cough', 'Cough'],
         digits=4
     ))
 
     # Confusion matrix
-    cm = confusion_matrix(y_true, y_pred)
+    cm = compute_confusion_matrix(y_true, y_pred, 2)
     print("Confusion Matrix:")
     print(cm)
     print(f"  True Negatives:  {cm[0,0]}")
@@ -148,18 +265,12 @@ def evaluate_detection_model(
 
     # Save confusion matrix plot
     if save_results:
+        import matplotlib.pyplot as plt
+
         output_dir = os.path.dirname(model_path)
         plot_path = os.path.join(output_dir, f'confusion_matrix_detection_{split}.png')
 
-        plt.figure(figsize=(8, 6))
-        sns.heatmap(
-            cm,
-            annot=True,
-            fmt='d',
-            cmap='Blues',
-            xticklabels=['Non-Cough', 'Cough'],
-            yticklabels=['Non-Cough', 'Cough']
-        )
+        plot_confusion_matrix(cm, ['Non-Cough', 'Cough'], figsize=(8, 6))
         plt.title(f'Detection Model - Confusion Matrix ({split.upper()} set)')
         plt.ylabel('True Label')
         plt.xlabel('Predicted Label')
@@ -182,18 +293,28 @@ def evaluate_classification_model(
     data_dir: str,
     split: str = 'test',
     batch_size: int = 32,
-    save_results: bool = True
+    save_results: bool = True,
+    cache_dir: Optional[str] = None
 ):
     """
     Evaluate multi-class classification model.
 
     Args:
-        model_path: Path to .h5 model file
+        model_path: Path to .keras or .h5 model file
         data_dir: Directory containing dataset
         split: Which split to evaluate ('train', 'val', or 'test')
         batch_size: Batch size for evaluation
         save_results: Whether to save confusion matrix plot
+        cache_dir: Directory for the on-disk MFCC feature cache (reused
+            across runs and splits; None recomputes features every run)
     """
+    from sklearn.metrics import (
+        classification_report,
+        accuracy_score,
+        precision_recall_fscore_support
+    )
+    from data_loader import CoughDataset
+
     print("=" * 70)
     print("EVALUATING CLASSIFICATION MODEL")
     print("=" * 70)
@@ -207,7 +328,8 @@ def evaluate_classification_model(
         data_dir=data_dir,
         window_size=1.5,
         sample_rate=audio_config.sample_rate,
-        use_augmentation=False
+        use_augmentation=False,
+        cache_dir=cache_dir
     )
 
     # Load splits
@@ -230,15 +352,12 @@ def evaluate_classification_model(
         augment=False
     )
 
-    # Get true labels
-    y_true = np.array([dataset.labels[i] for i in splits[split]])
-
     # Evaluate model
     print(f"\nEvaluating on {len(splits[split])} samples...")
     print("-" * 70)
 
-    # Get predictions
-    y_pred_proba = model.predict(eval_dataset, verbose=1)
+    # Get predictions and true labels in one pass
+    y_true, y_pred_proba = predict_dataset(model, eval_dataset, len(splits[split]))
     y_pred = np.argmax(y_pred_proba, axis=1)
 
     # Calculate metrics
@@ -260,37 +379,35 @@ def evaluate_classification_model(
     print(classification_report(
         y_true,
         y_pred,
+        labels=list(range(len(class_names))),
         target_names=class_names,
         digits=4
     ))
 
     # Confusion matrix
-    cm = confusion_matrix(y_true, y_pred)
+    n_classes = len(class_names)
+    cm = compute_confusion_matrix(y_true, y_pred, n_classes)
     print("\nConfusion Matrix:")
     print(cm)
 
-    # Per-class accuracy
+    # Per-class accuracy (correct predictions are the diagonal)
+    correct = np.diag(cm)[:n_classes]
+    total = cm.sum(axis=1)[:n_classes]
+    class_acc = correct / np.maximum(total, 1)
+
     print("\nPer-Class Accuracy:")
     for i, class_name in enumerate(class_names):
-        class_mask = (y_true == i)
-        if class_mask.sum() > 0:
-            class_acc = (y_pred[class_mask] == i).sum() / class_mask.sum()
-            print(f"  {class_name}: {class_acc:.4f} ({class_acc*100:.2f}%)")
+        if total[i] > 0:
+            print(f"  {class_name}: {class_acc[i]:.4f} ({class_acc[i]*100:.2f}%)")
 
     # Save confusion matrix plot
     if save_results:
+        import matplotlib.pyplot as plt
+
         output_dir = os.path.dirname(model_path)
         plot_path = os.path.join(output_dir, f'confusion_matrix_classification_{split}.png')
 
-        plt.figure(figsize=(10, 8))
-        sns.heatmap(
-            cm,
-            annot=True,
-            fmt='d',
-            cmap='Blues',
-            xticklabels=class_names,
-            yticklabels=class_names
-        )
+        plot_confusion_matrix(cm, class_names, figsize=(10, 8))
         plt.title(f'Classification Model - Confusion Matrix ({split.upper()} set)')
         plt.ylabel('True Label')
         plt.xlabel('Predicted Label')
@@ -316,7 +433,7 @@ def main():
         '--model_path',
         type=str,
         required=True,
-        help='Path to .h5 model file'
+        help='Path to .keras or .h5 model file'
     )
     parser.add_argument(
         '--data_dir',
@@ -327,9 +444,9 @@ def main():
     parser.add_argument(
         '--split',
         type=str,
-        choices=['train', 'val', 'test'],
+        choices=['train', 'val', 'test', 'all'],
         default='test',
-        help='Which dataset split to evaluate on'
+        help="Which dataset split to evaluate on ('all' evaluates every split)"
     )
     parser.add_argument(
         '--model_type',
@@ -344,6 +461,12 @@ def main():
         default=32,
         help='Batch size for evaluation'
     )
+    parser.add_argument(
+        '--cache_dir',
+        type=str,
+        default=None,
+        help='Cache extracted MFCC features here and reuse them on later runs'
+    )
     parser.add_argument(
         '--no_save',
         action='store_true',
@@ -363,22 +486,22 @@ def main():
             print("Please specify --model_type explicitly.")
             return
 
-    # Evaluate model
-    if args.model_type == 'detection':
-        results = evaluate_detection_model(
-            model_path=args.model_path,
-            data_dir=args.data_dir,
-            split=args.split,
-            batch_size=args.batch_size,
-            save_results=not args.no_save
-        )
-    else:  # classification
-        results = evaluate_classification_model(
+    # Evaluate model (load_model is memoized, so 'all' loads it once)
+    splits = ['train', 'val', 'test'] if args.split == 'all' else [args.split]
+    evaluate_fn = (
+        evaluate_detection_model if args.model_type == 'detection'
+        else evaluate_classification_model
+    )
+
+    results = {}
+    for split in splits:
+        results[split] = evaluate_fn(
             model_path=args.model_path,
             data_dir=args.data_dir,
-            split=args.split,
+            split=split,
             batch_size=args.batch_size,
-            save_results=not args.no_save
+            save_results=not args.no_save,
+            cache_dir=args.cache_dir
         )
 
     print("\n" + "=" * 70)
@@ -2,11 +2,11 @@
 Example usage of the cough detection system
 """
 import numpy as np
-import librosa
+import tensorflow as tf
 from pathlib import Path
 
 from models import CoughDetectionModel, CoughClassificationModel, CoughDetectionPipeline
-from feature_extraction import MFCCExtractor
+from feature_extraction import MFCCExtractor, TFMFCCExtractor, load_audio_file
 from config import audio_config
 
 
@@ -19,8 +19,8 @@ def example_single_file_prediction():
     # Load models
     print("\n[1] Loading models...")
     pipeline = CoughDetectionPipeline.load(
-        detection_path="hardware/AI/models/detection_model_best.h5",
-        classification_path="hardware/AI/models/classification_model_best.h5"
+        detection_path="hardware/AI/models/detection_model_best.keras",
+        classification_path="hardware/AI/models/classification_model_best.keras"
     )
     print("✓ Models loaded")
 
@@ -33,7 +33,8 @@ def example_single_file_prediction():
         print("   Please provide a valid WAV file path")
         return
 
-    audio, sr = librosa.load(audio_file, sr=audio_config.sample_rate, mono=True)
+    sr = audio_config.sample_rate
+    audio = load_audio_file(audio_file, sr=sr)
     print(f"✓ Loaded {len(audio)/sr:.2f}s of audio at {sr}Hz")
 
     # Extract features
@@ -44,7 +45,7 @@ def example_single_file_prediction():
 
     # Predict
     print("\n[4] Running neural network prediction...")
-    result = pipeline.predict(features)
+    result = pipeline.predict(features, audio=audio)
 
     # Display results
     print("\n" + "=" * 70)
@@ -67,8 +68,8 @@ def example_batch_prediction():
 
     # Load models
     pipeline = CoughDetectionPipeline.load(
-        detection_path="hardware/AI/models/detection_model_best.h5",
-        classification_path="hardware/AI/models/classification_model_best.h5"
+        detection_path="hardware/AI/models/detection_model_best.keras",
+        classification_path="hardware/AI/models/classification_model_best.keras"
     )
 
     # Get list of files
@@ -81,20 +82,49 @@ def example_batch_prediction():
 
     print(f"\nProcessing {len(audio_files)} files...\n")
 
-    extractor = MFCCExtractor()
-    results = []
-
-    for i, audio_file in enumerate(audio_files, 1):
-        print(f"[{i}/{len(audio_files)}] {audio_file.name}...", end=" ")
-
-        # Load and extract features
-        audio, sr = librosa.load(audio_file, sr=audio_config.sample_rate, mono=True)
-        features = extractor.extract_normalized(audio, sr=sr)
-
-        # Predict
-        result = pipeline.predict(features)
+    sr = audio_config.sample_rate
+    window_samples = int(audio_config.detection_window * sr)
+    extractor = TFMFCCExtractor(window_samples, sr=sr)
+
+    def load_window(path):
+        """Load a file and pad/trim it to one detection window."""
+        audio = load_audio_file(path.decode(), sr=sr)
+        window = np.zeros(window_samples, dtype=np.float32)
+        n = min(len(audio), window_samples)
+        window[:n] = audio[:n]
+        return window
+
+    # Load files in parallel, extract MFCCs per batch and keep the next
+    # batch ready while the models run on the current one
+    dataset = tf.data.Dataset.from_tensor_slices([str(f) for f in audio_files])
+    dataset = dataset.map(
+        lambda path: tf.ensure_shape(
+            tf.numpy_function(load_window, [path], tf.float32),
+            [window_samples]
+        ),
+        num_parallel_calls=tf.data.AUTOTUNE
+    )
+    dataset = dataset.batch(32)
+    dataset = dataset.map(extractor.extract_normalized, num_parallel_calls=tf.data.AUTOTUNE)
+    dataset = dataset.prefetch(tf.data.AUTOTUNE)
+
+    # Pass 1: extract every file's features into one preallocated array
+    features = None
+    offset = 0
+    for batch in dataset:
+        batch = batch.numpy()
+        if features is None:
+            features = np.empty((len(audio_files), *batch.shape[1:]), dtype=np.float32)
+        features[offset:offset + len(batch)] = batch
+        offset += len(batch)
+
+    # Pass 2: one detection call over all files, one classification call
+    # over the detected coughs
+    results = pipeline.predict_batch(features)
+
+    for i, (audio_file, result) in enumerate(zip(audio_files, results), 1):
         result['filename'] = audio_file.name
-        results.append(result)
+        print(f"[{i}/{len(audio_files)}] {audio_file.name}...", end=" ")
 
         # Print result
         if result['is_cough']:
@@ -115,8 +145,8 @@ def example_custom_threshold():
 
     # Load models
     pipeline = CoughDetectionPipeline.load(
-        detection_path="hardware/AI/models/detection_model_best.h5",
-        classification_path="hardware/AI/models/classification_model_best.h5"
+        detection_path="hardware/AI/models/detection_model_best.keras",
+        classification_path="hardware/AI/models/classification_model_best.keras"
     )
 
     # Adjust detection threshold
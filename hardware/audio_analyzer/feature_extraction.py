@@ -2,11 +2,115 @@
 MFCC Feature Extraction for Cough Detection
 Based on recommendations from journal.md and the research paper
 """
+import functools
+import threading
+from fractions import Fraction
 import numpy as np
+import scipy.fft
+import scipy.signal
 import librosa
+import soundfile as sf
+import tensorflow as tf
 from typing import Optional, Tuple
 from config import audio_config, mfcc_config
 
+# numba is installed with librosa; without it normalization stays in numpy
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _normalize_rows(x: np.ndarray) -> None:
+    """
+    In-place zero-mean, unit-variance normalization of each row of a 2-D
+    array, one row at a time so the row stays in cache across the passes.
+    Rows with zero variance are only centered.
+    """
+    n_rows, n = x.shape
+    for i in range(n_rows):
+        mean = 0.0
+        for j in range(n):
+            mean += x[i, j]
+        mean /= n
+
+        sumsq = 0.0
+        for j in range(n):
+            d = x[i, j] - mean
+            x[i, j] = d
+            sumsq += d * d
+
+        std = np.sqrt(sumsq / n)
+        inv = 1.0 / std if std > 0 else 1.0
+        for j in range(n):
+            x[i, j] *= inv
+
+
+if njit is not None:
+    _normalize_rows = njit(cache=True)(_normalize_rows)
+else:
+    _normalize_rows = None
+
+
+def load_audio_file(file_path: str, sr: Optional[int] = None) -> np.ndarray:
+    """
+    Load an audio file as mono float32 at the given sample rate.
+
+    Reads through soundfile directly and only resamples when the file's
+    native rate differs from `sr`, instead of always routing through
+    librosa.load's resampler. Falls back to librosa for formats that
+    libsndfile cannot decode.
+
+    Args:
+        file_path: Path to the audio file (or a file-like object)
+        sr: Target sample rate (defaults to audio_config.sample_rate)
+
+    Returns:
+        Audio signal (1D float32 numpy array)
+    """
+    if sr is None:
+        sr = audio_config.sample_rate
+
+    try:
+        audio, file_sr = sf.read(file_path, dtype='float32', always_2d=False)
+    except RuntimeError:
+        audio, _ = librosa.load(file_path, sr=sr, mono=True)
+        return audio
+
+    # Downmix to mono
+    if audio.ndim == 2:
+        audio = audio.mean(axis=1)
+
+    if file_sr != sr:
+        audio = librosa.resample(audio, orig_sr=file_sr, target_sr=sr)
+
+    return audio
+
+
+@functools.lru_cache(maxsize=8)
+def _mel_filterbank(sr: int, n_fft: int, n_mels: int, fmin: float, fmax: float) -> np.ndarray:
+    """Mel filterbank shared by every extractor with the same settings
+    (read-only, so it is safe to share across threads)."""
+    mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels, fmin=fmin, fmax=fmax)
+    mel_basis.flags.writeable = False
+    return mel_basis
+
+
+@functools.lru_cache(maxsize=8)
+def _hann_window(n_fft: int) -> np.ndarray:
+    """Periodic Hann analysis window (read-only, shared)."""
+    window = scipy.signal.get_window('hann', n_fft, fftbins=True).astype(np.float32)
+    window.flags.writeable = False
+    return window
+
+
+@functools.lru_cache(maxsize=8)
+def _dct_basis(n_mels: int, n_mfcc: int) -> np.ndarray:
+    """First n_mfcc rows of the orthonormal DCT-II matrix (read-only, shared)."""
+    basis = scipy.fft.dct(np.eye(n_mels), type=2, norm='ortho', axis=0)[:n_mfcc].astype(np.float32)
+    basis.flags.writeable = False
+    return basis
+
 
 class MFCCExtractor:
     """
@@ -20,71 +124,192 @@ class MFCCExtractor:
         self.config = config or mfcc_config
         self.audio_config = audio_config
 
-    def extract(self, audio: np.ndarray, sr: Optional[int] = None) -> np.ndarray:
-        """
-        Extract MFCC features from audio signal.
+        # Analysis window and DCT-II basis are fixed by the config; they (and
+        # the mel filterbank) are built once per process and shared between
+        # extractor instances
+        self._window = _hann_window(self.config.n_fft)
+        self._dct_basis = _dct_basis(self.config.n_mels, self.config.n_mfcc)
 
-        Args:
-            audio: Audio signal (1D numpy array)
-            sr: Sample rate (defaults to audio_config.sample_rate)
+        # Per-thread zero-padding buffer for extract_with_context
+        self._local = threading.local()
 
-        Returns:
-            MFCC features of shape (n_features, n_frames)
-            where n_features = 39 (13 MFCCs + 13 deltas + 13 delta-deltas)
+    def _mel_basis(self, sr: int) -> np.ndarray:
+        """Mel filterbank for the given sample rate (built once per rate)."""
+        return _mel_filterbank(sr, self.config.n_fft, self.config.n_mels, self.config.fmin, self.config.fmax)
+
+    def _padded_window(self, audio: np.ndarray, n_samples: int) -> np.ndarray:
         """
-        if sr is None:
-            sr = self.audio_config.sample_rate
+        Copy a short clip into a reused zero-padded buffer of n_samples.
 
-        # Ensure audio is float32
-        audio = audio.astype(np.float32)
+        The buffer is per thread, so a shared extractor stays safe; only the
+        tail written by the previous call is re-zeroed.
+        """
+        buf = getattr(self._local, 'window_buf', None)
+        if buf is None or len(buf) != n_samples:
+            buf = self._local.window_buf = np.zeros(n_samples, dtype=np.float32)
+            self._local.filled = 0
+
+        n = len(audio)
+        buf[:n] = audio
+        if self._local.filled > n:
+            buf[n:self._local.filled] = 0
+        self._local.filled = n
+        return buf
+
+    def _features(self, audio: np.ndarray, sr: int) -> np.ndarray:
+        """
+        MFCCs (+ deltas) for audio of shape (..., n_samples).
+
+        Same steps as librosa.feature.mfcc, using the cached window, mel
+        filterbank and DCT basis. Returns shape (..., n_features, n_frames).
+        """
+        return self._features_from_mel(self._mel_power(audio, sr))
 
-        # Extract base MFCCs
-        mfccs = librosa.feature.mfcc(
-            y=audio,
-            sr=sr,
-            n_mfcc=self.config.n_mfcc,
+    def _mel_power(self, audio: np.ndarray, sr: int, center: bool = True) -> np.ndarray:
+        """Mel power spectrogram of shape (..., n_mels, n_frames)."""
+        power = np.abs(librosa.stft(
+            audio,
             n_fft=self.config.n_fft,
             hop_length=self.config.hop_length,
-            n_mels=self.config.n_mels,
-            fmin=self.config.fmin,
-            fmax=self.config.fmax
-        )
+            window=self._window,
+            center=center
+        )) ** 2
+        return self._mel_basis(sr) @ power
+
+    def _features_from_mel(self, mel: np.ndarray) -> np.ndarray:
+        """MFCCs (+ deltas) from a mel power spectrogram."""
+        # power_to_db(ref=1.0, top_db=80), with the top_db floor per clip
+        log_mel = 10.0 * np.log10(np.maximum(mel, 1e-10))
+        log_mel = np.maximum(log_mel, log_mel.max(axis=(-2, -1), keepdims=True) - 80.0)
+
+        mfccs = self._dct_basis @ log_mel
 
         features = [mfccs]
 
         # Add delta (first derivative)
         if self.config.use_deltas:
-            delta = librosa.feature.delta(mfccs)
-            features.append(delta)
+            features.append(librosa.feature.delta(mfccs, axis=-1))
 
         # Add delta-delta (second derivative / acceleration)
         if self.config.use_delta_deltas:
-            delta2 = librosa.feature.delta(mfccs, order=2)
-            features.append(delta2)
+            features.append(librosa.feature.delta(mfccs, order=2, axis=-1))
 
-        # Stack features: shape (39, n_frames)
-        features = np.vstack(features)
+        return np.concatenate(features, axis=-2)
 
+    @staticmethod
+    def _normalize(features: np.ndarray) -> np.ndarray:
+        """
+        Normalize to zero mean, unit variance per feature over time.
+
+        Works in place on `features` (a fresh array from _features). With
+        numba this is a single compiled kernel; otherwise the variance comes
+        from one dot product of the centered rows, so no temporaries the
+        size of the feature matrix are allocated.
+        """
+        if _normalize_rows is not None and features.flags.c_contiguous and features.size:
+            _normalize_rows(features.reshape(-1, features.shape[-1]))
+            return features
+
+        features -= np.mean(features, axis=-1, keepdims=True)
+
+        sumsq = np.einsum('...t,...t->...', features, features)[..., None]
+        std = np.sqrt(sumsq / features.shape[-1])
+
+        # Avoid division by zero
+        std[std == 0] = 1
+
+        features /= std
         return features
 
+    def extract(self, audio: np.ndarray, sr: Optional[int] = None) -> np.ndarray:
+        """
+        Extract MFCC features from audio signal.
+
+        Args:
+            audio: Audio signal (1D numpy array)
+            sr: Sample rate (defaults to audio_config.sample_rate)
+
+        Returns:
+            MFCC features of shape (n_features, n_frames)
+            where n_features = 39 (13 MFCCs + 13 deltas + 13 delta-deltas)
+        """
+        if sr is None:
+            sr = self.audio_config.sample_rate
+
+        # Ensure audio is float32
+        audio = audio.astype(np.float32)
+
+        return self._features(audio, sr)
+
     def extract_normalized(self, audio: np.ndarray, sr: Optional[int] = None) -> np.ndarray:
         """
         Extract and normalize MFCC features.
 
         Normalization improves neural network training stability.
         """
-        features = self.extract(audio, sr)
+        return self._normalize(self.extract(audio, sr))
 
-        # Normalize to zero mean, unit variance per feature
-        mean = np.mean(features, axis=1, keepdims=True)
-        std = np.std(features, axis=1, keepdims=True)
+    def extract_incremental(
+        self,
+        window: np.ndarray,
+        shift: Optional[int],
+        cache: Optional[np.ndarray],
+        sr: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Normalized MFCCs for a sliding window, reusing the previous window's
+        STFT/mel frames (overlap-save).
 
-        # Avoid division by zero
-        std = np.where(std == 0, 1, std)
+        When the window advanced by a whole number of STFT hops, every frame
+        that lies fully inside both windows is taken from the cache and only
+        the edge frames are recomputed; dB scaling, DCT, deltas and
+        normalization then run over the full window as usual, so the result
+        matches extract_normalized(window). Anything else (no cache, unknown
+        or unaligned shift, shift longer than the window) falls back to a
+        full recompute.
 
-        normalized = (features - mean) / std
+        Args:
+            window: Current audio window (same length on every call)
+            shift: Samples the window advanced since the call that produced
+                cache (None if unknown)
+            cache: Mel power returned by the previous call, or None
+            sr: Sample rate
+
+        Returns:
+            features: Normalized MFCC features (n_features, n_frames)
+            mel: Mel power of this window, to pass back as cache next time
+        """
+        if sr is None:
+            sr = self.audio_config.sample_rate
+
+        window = np.asarray(window, dtype=np.float32)
+        hop = self.config.hop_length
+        n_fft = self.config.n_fft
+        pad = n_fft // 2
+
+        # Frame t covers samples [t*hop - pad, t*hop - pad + n_fft) of the
+        # window; only frames in [first_inner, last_inner] avoid the padding
+        first_inner = -(-pad // hop)
+        last_inner = (len(window) - n_fft + pad) // hop
+
+        k = shift // hop if shift is not None and shift > 0 and shift % hop == 0 else 0
+        if cache is None or k == 0 or last_inner - k < first_inner:
+            mel = self._mel_power(window, sr)
+            return self._normalize(self._features_from_mel(mel)), mel
+
+        mel = np.empty_like(cache)
+        reuse_end = last_inner - k + 1
+        mel[:, first_inner:reuse_end] = cache[:, first_inner + k:last_inner + 1]
+
+        # Recompute the edge frames from the zero-padded window (what
+        # librosa.stft(center=True) sees)
+        padded = np.pad(window, pad)
+        mel[:, :first_inner] = self._mel_power(
+            padded[:(first_inner - 1) * hop + n_fft], sr, center=False
+        )
+        mel[:, reuse_end:] = self._mel_power(padded[reuse_end * hop:], sr, center=False)
 
-        return normalized
+        return self._normalize(self._features_from_mel(mel)), mel
 
     def extract_with_context(
         self,
@@ -112,8 +337,8 @@ class MFCCExtractor:
 
         # Pad or trim audio to expected length
         if len(audio) < expected_samples:
-            # Pad with zeros
-            audio = np.pad(audio, (0, expected_samples - len(audio)))
+            # Pad with zeros (into a reused buffer)
+            audio = self._padded_window(audio, expected_samples)
         elif len(audio) > expected_samples:
             # Trim to expected length
             audio = audio[:expected_samples]
@@ -142,7 +367,10 @@ class MFCCExtractor:
         This can be used as a quick pre-filter before running the neural network.
         More sophisticated than just threshold, but still very fast.
         """
-        return np.sqrt(np.mean(audio**2))
+        audio = np.asarray(audio, dtype=np.float32).ravel()
+        if audio.size == 0:
+            return 0.0
+        return float(np.sqrt(np.dot(audio, audio) / audio.size))
 
     def extract_batch(self, audio_list: list, sr: Optional[int] = None) -> np.ndarray:
         """
@@ -155,17 +383,88 @@ class MFCCExtractor:
         Returns:
             Batch of features with shape (batch_size, n_features, n_frames)
         """
-        features_list = []
+        if sr is None:
+            sr = self.audio_config.sample_rate
+
+        # Assuming all have same length (handled by extract_with_context)
+        audio = np.stack(audio_list, axis=0).astype(np.float32)
+
+        # One STFT over the whole (batch, samples) array, then the mel
+        # projection, log and DCT as batched array ops
+        return self._normalize(self._features(audio, sr))
+
+
+class TFMFCCExtractor:
+    """
+    TensorFlow graph version of MFCCExtractor.extract_normalized.
+
+    Reproduces librosa's pipeline (centered STFT, mel filterbank, power_to_db
+    with top_db=80, orthonormal DCT-II, Savitzky-Golay deltas) with TF ops so
+    it can run inside tf.data without holding the GIL. Works on a fixed clip
+    length; leading batch dimensions are supported.
+    """
+
+    def __init__(self, n_samples: int, sr: Optional[int] = None, config=None):
+        self.config = config or mfcc_config
+        self.sr = sr or audio_config.sample_rate
+        self.n_samples = n_samples
+        self.n_frames = 1 + n_samples // self.config.hop_length
+
+        mel_basis = _mel_filterbank(self.sr, self.config.n_fft, self.config.n_mels, self.config.fmin, self.config.fmax)
+        self.mel_basis = tf.constant(mel_basis.T, dtype=tf.float32)
+
+        # librosa.feature.delta is linear along time, so it reduces to a
+        # (n_frames, n_frames) matrix applied on the right
+        eye = np.eye(self.n_frames, dtype=np.float32)
+        self.delta_matrix = tf.constant(librosa.feature.delta(eye), dtype=tf.float32)
+        self.delta2_matrix = tf.constant(librosa.feature.delta(eye, order=2), dtype=tf.float32)
+
+    def extract(self, audio: tf.Tensor) -> tf.Tensor:
+        """
+        Extract MFCC features from audio of shape (..., n_samples).
 
-        for audio in audio_list:
-            features = self.extract_normalized(audio, sr)
-            features_list.append(features)
+        Returns:
+            Tensor of shape (..., n_features, n_frames)
+        """
+        audio = tf.cast(audio, tf.float32)
+        pad = self.config.n_fft // 2
+        paddings = [[0, 0]] * (len(audio.shape) - 1) + [[pad, pad]]
+        audio = tf.pad(audio, paddings)
+
+        stft = tf.signal.stft(
+            audio,
+            frame_length=self.config.n_fft,
+            frame_step=self.config.hop_length,
+            fft_length=self.config.n_fft,
+            window_fn=tf.signal.hann_window
+        )
+        power = tf.math.square(tf.math.abs(stft))
+        mel = tf.matmul(power, self.mel_basis)
+
+        # power_to_db(ref=1.0, amin=1e-10, top_db=80)
+        log_mel = 10.0 * tf.math.log(tf.maximum(mel, 1e-10)) / tf.math.log(10.0)
+        log_mel = tf.maximum(log_mel, tf.reduce_max(log_mel, axis=[-2, -1], keepdims=True) - 80.0)
 
-        # Stack into batch
-        # Assuming all have same shape (handled by extract_with_context)
-        batch = np.stack(features_list, axis=0)
+        mfccs = tf.signal.dct(log_mel, type=2, norm='ortho')[..., :self.config.n_mfcc]
+        mfccs = tf.linalg.matrix_transpose(mfccs)
+
+        features = [mfccs]
+        if self.config.use_deltas:
+            features.append(tf.matmul(mfccs, self.delta_matrix))
+        if self.config.use_delta_deltas:
+            features.append(tf.matmul(mfccs, self.delta2_matrix))
 
-        return batch
+        return tf.concat(features, axis=-2)
+
+    def extract_normalized(self, audio: tf.Tensor) -> tf.Tensor:
+        """Extract MFCC features normalized to zero mean, unit variance per feature."""
+        features = self.extract(audio)
+
+        mean = tf.reduce_mean(features, axis=-1, keepdims=True)
+        std = tf.math.reduce_std(features, axis=-1, keepdims=True)
+        std = tf.where(std == 0, tf.ones_like(std), std)
+
+        return (features - mean) / std
 
 
 class AudioPreprocessor:
@@ -174,8 +473,26 @@ class AudioPreprocessor:
     Includes the data augmentation techniques from the paper.
     """
 
-    def __init__(self, sr: int = 8000):
+    def __init__(self, sr: int = 8000, high_quality: bool = False):
+        """
+        Args:
+            sr: Sample rate of the audio being augmented
+            high_quality: Use librosa's pitch-preserving time stretch for
+                speed changes instead of the much cheaper resampling
+        """
         self.sr = sr
+        self.high_quality = high_quality
+
+        # One PCG64 generator per thread: no shared global RandomState lock
+        # when tf.data runs augmentation from several threads
+        self._rng = threading.local()
+
+    def _thread_rng(self) -> np.random.Generator:
+        """Return the calling thread's random generator."""
+        rng = getattr(self._rng, 'rng', None)
+        if rng is None:
+            rng = self._rng.rng = np.random.default_rng()
+        return rng
 
     def time_shift(self, audio: np.ndarray, shift_pct: float = 0.2) -> np.ndarray:
         """
@@ -186,22 +503,37 @@ class AudioPreprocessor:
             shift_pct: Maximum shift as percentage of signal length
         """
         shift_max = int(len(audio) * shift_pct)
-        shift = np.random.randint(-shift_max, shift_max)
+        shift = self._thread_rng().integers(-shift_max, shift_max) % len(audio)
 
-        return np.roll(audio, shift)
+        # Same result as np.roll(audio, shift), written with two slice
+        # copies into one output array
+        shifted = np.empty_like(audio)
+        shifted[:shift] = audio[len(audio) - shift:]
+        shifted[shift:] = audio[:len(audio) - shift]
+
+        return shifted
 
     def speed_change(self, audio: np.ndarray, speed_range: Tuple[float, float] = (0.9, 1.1)) -> np.ndarray:
         """
-        Change playback speed without changing pitch.
+        Change playback speed.
+
+        By default this resamples the clip with a polyphase filter, which
+        shifts pitch along with speed (like playing a tape faster). With
+        high_quality set, librosa's phase vocoder keeps the pitch instead.
 
         Args:
             audio: Input audio
             speed_range: (min_rate, max_rate) for speed change
         """
-        rate = np.random.uniform(speed_range[0], speed_range[1])
+        rate = self._thread_rng().uniform(speed_range[0], speed_range[1])
 
-        # Use librosa's time stretching
-        stretched = librosa.effects.time_stretch(audio, rate=rate)
+        if self.high_quality:
+            # Use librosa's time stretching
+            stretched = librosa.effects.time_stretch(audio, rate=rate)
+        else:
+            # Playing `rate` times faster is resampling by 1/rate
+            speed_num, speed_den = Fraction(rate).limit_denominator(100).as_integer_ratio()
+            stretched = scipy.signal.resample_poly(audio, speed_den, speed_num)
 
         # Pad or trim to original length
         if len(stretched) < len(audio):
@@ -220,33 +552,27 @@ class AudioPreprocessor:
             snr_db: Signal-to-noise ratio in dB
             noise: Noise signal (if None, white noise is used)
         """
+        n = len(audio)
+        rng = self._thread_rng()
+
         # Calculate signal power
-        signal_power = np.mean(audio ** 2)
+        signal_power = np.dot(audio, audio) / n
 
         # Generate or use provided noise
         if noise is None:
-            noise = np.random.normal(0, 1, len(audio))
+            noise = rng.standard_normal(n, dtype=np.float32)
+        elif len(noise) < n:
+            # Repeat noise from a random phase (wraps around, no tiled copy)
+            start = rng.integers(0, len(noise))
+            noise = noise[(np.arange(n) + start) % len(noise)]
         else:
-            # Ensure noise is same length
-            if len(noise) < len(audio):
-                # Repeat noise
-                reps = int(np.ceil(len(audio) / len(noise)))
-                noise = np.tile(noise, reps)[:len(audio)]
-            else:
-                # Random crop from noise
-                start = np.random.randint(0, len(noise) - len(audio))
-                noise = noise[start:start + len(audio)]
-
-        # Calculate noise power for desired SNR
-        snr_linear = 10 ** (snr_db / 10)
-        noise_power = signal_power / snr_linear
-
-        # Scale noise
-        current_noise_power = np.mean(noise ** 2)
-        noise = noise * np.sqrt(noise_power / current_noise_power)
+            # Random crop from noise
+            start = rng.integers(0, len(noise) - n + 1)
+            noise = noise[start:start + n]
 
-        # Add noise to signal
-        noisy_audio = audio + noise
+        # Scale noise to the desired SNR and add it to the signal
+        snr_linear = 10 ** (snr_db / 10)
+        noisy_audio = audio + noise * np.sqrt(signal_power / (snr_linear * (np.dot(noise, noise) / n)))
 
         return noisy_audio
 
@@ -266,18 +592,19 @@ class AudioPreprocessor:
                 'noise_snr_range': (-5, 15)
             }
 
+        rng = self._thread_rng()
         augmented = audio.copy()
 
         # Apply augmentations randomly
-        if augmentation_config.get('time_shift', True) and np.random.rand() > 0.5:
+        if augmentation_config.get('time_shift', True) and rng.random() > 0.5:
             augmented = self.time_shift(augmented)
 
-        if augmentation_config.get('speed_change', True) and np.random.rand() > 0.5:
+        if augmentation_config.get('speed_change', True) and rng.random() > 0.5:
             augmented = self.speed_change(augmented)
 
-        if augmentation_config.get('add_noise', True) and np.random.rand() > 0.5:
+        if augmentation_config.get('add_noise', True) and rng.random() > 0.5:
             snr_range = augmentation_config.get('noise_snr_range', (-5, 15))
-            snr = np.random.uniform(snr_range[0], snr_range[1])
+            snr = rng.uniform(snr_range[0], snr_range[1])
             augmented = self.add_noise(augmented, snr_db=snr)
 
         return augmented
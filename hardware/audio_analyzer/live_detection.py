@@ -11,27 +11,58 @@ import sounddevice as sd
 from dataclasses import dataclass
 import numpy as np
 import math
-from collections import deque
-import pandas as pd
+import soundfile as sf
 import time
 import os
+import sys
 import threading
 import queue
 from pynput import keyboard
 import tensorflow as tf
 from pathlib import Path
+from typing import Optional
 
 from config import audio_config
 from feature_extraction import MFCCExtractor
 from models import CoughDetectionPipeline
 
 
+def configure_tf_threading(intra_op: int = 2, inter_op: int = 1) -> bool:
+    """
+    Limit TensorFlow's thread pools for single-window inference.
+
+    The per-window models are tiny, so large thread pools only add wake-up
+    latency and contend with the audio callback. OpenMP defaults are set to
+    match (unless already set in the environment); they take effect as long
+    as the OpenMP runtime has not started yet.
+
+    Must run before TensorFlow executes its first op; afterwards the
+    runtime is already initialized and the settings cannot change.
+
+    Args:
+        intra_op: Threads used inside a single op
+        inter_op: Threads used to run independent ops concurrently
+
+    Returns:
+        True if the settings were applied
+    """
+    os.environ.setdefault('OMP_NUM_THREADS', str(intra_op))
+    os.environ.setdefault('KMP_BLOCKTIME', '0')
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+        return True
+    except RuntimeError as e:
+        print(f"⚠️  Could not set TensorFlow threading (runtime already initialized): {e}")
+        return False
+
+
 @dataclass
 class DetectionConfig:
     """Configuration for live detection."""
     sample_rate: int = 8000
     channels: int = 1
-    dtype: str = 'float32'
+    dtype: str = 'int16'  # ring buffer sample type; windows are scaled to float32
     block_size: int = 2048
 
     # Buffer settings
@@ -44,12 +75,20 @@ class DetectionConfig:
     energy_threshold: float = 0.01  # Minimum RMS to consider
 
     # Model paths
-    detection_model_path: str = "hardware/AI/models/detection_model_best.h5"
-    classification_model_path: str = "hardware/AI/models/classification_model_best.h5"
+    detection_model_path: str = "hardware/AI/models/detection_model_best.keras"
+    classification_model_path: str = "hardware/AI/models/classification_model_best.keras"
 
     # Detection threshold
     detection_confidence: float = 0.7  # Probability threshold
 
+    # CPU core to pin the detection thread to (None = no pinning, Linux only)
+    detection_cpu: Optional[int] = None
+
+    # Limit TensorFlow to small thread pools (see configure_tf_threading).
+    # Applies process-wide, so turn it off when sharing TensorFlow with
+    # other work.
+    limit_tf_threads: bool = True
+
     # Output settings
     save_detections: bool = True
     save_dir: str = "hardware/AI/detections"
@@ -65,14 +104,58 @@ class LiveCoughDetector:
     def __init__(self, config: DetectionConfig = DetectionConfig()):
         self.config = config
 
-        # Audio buffer
-        total_samples = int(config.sample_rate * config.buffer_duration)
-        deque_maxlen_blocks = math.ceil(total_samples / config.block_size)
-        self.display_buffer = deque(maxlen=deque_maxlen_blocks)
-        self.buffer_lock = threading.Lock()
+        if config.limit_tf_threads:
+            configure_tf_threading()
 
-        # Feature extractor
+        # Audio ring buffer (single producer: the audio callback; single
+        # consumer: the detection loop). Its size is rounded up to a power
+        # of two so positions wrap with a mask. _write_idx counts every
+        # sample ever written and is only advanced after the samples are in
+        # place; a plain int store is atomic under the GIL, so no lock is
+        # taken in the real-time callback.
+        total_samples = int(config.sample_rate * config.buffer_duration)
+        ring_size = 1 << max(total_samples - 1, 1).bit_length()
+        self._ring = np.zeros(ring_size, dtype=config.dtype)
+        self._ring_mask = ring_size - 1
+        self._write_idx = 0
+
+        # Integer samples are stored as captured and only scaled to [-1, 1)
+        # when a detection window is read
+        if np.issubdtype(self._ring.dtype, np.integer):
+            self._sample_scale = 1.0 / (np.iinfo(self._ring.dtype).max + 1)
+        else:
+            self._sample_scale = 1.0
+
+        # Running sum of squares (in raw sample units), stored per sample
+        # alongside the ring: the energy of any recent window is the
+        # difference of two entries, so the pre-filter never rescans the
+        # window. float64 keeps the running total exact enough for days of
+        # audio.
+        self._cum_sumsq = np.zeros(ring_size, dtype=np.float64)
+        self._total_sumsq = 0.0
+        self._block_sumsq = np.empty(config.block_size, dtype=np.float64)
+
+        # Scratch float32 window the detection loop reads into, so it never
+        # allocates one per hop
+        self._detection_samples = int(config.detection_window * config.sample_rate)
+        self._window_buf = np.empty(self._detection_samples, dtype=np.float32)
+
+        # Progress dots for windows without a cough, written in batches so
+        # the loop doesn't flush stdout every hop
+        self._tick_count = 0
+        self._tick_stride = 10
+
+        # The audio callback sets _hop_event once a hop's worth of new
+        # samples has arrived; the detection loop blocks on it
+        self._hop_samples = max(1, int(config.hop_length * config.sample_rate))
+        self._samples_since_hop = 0
+        self._hop_event = threading.Event()
+
+        # Feature extractor, plus the previous window's mel frames and end
+        # position for overlap-save extraction across hops
         self.extractor = MFCCExtractor()
+        self._mel_cache = None
+        self._mel_cache_end = None
 
         # Load models
         print("Loading neural network models...")
@@ -105,6 +188,11 @@ class LiveCoughDetector:
             )
             print("✓ Models loaded successfully!")
 
+            # Trace/compile the graphs now rather than on the first window
+            warmup_start = time.perf_counter()
+            self.pipeline.warmup(self._detection_samples)
+            print(f"✓ Inference warm-up took {(time.perf_counter() - warmup_start) * 1000:.0f} ms")
+
         except Exception as e:
             print(f"ERROR: Could not load models: {e}")
             print("\nMake sure you have trained the models first using train.py")
@@ -118,33 +206,186 @@ class LiveCoughDetector:
         if status:
             print(f"Audio callback status: {status}")
 
-        with self.buffer_lock:
-            self.display_buffer.append(indata.flatten())
+        block = indata[:, 0]
+        n = len(block)
+        start = self._write_idx & self._ring_mask
+        end = start + n
+
+        # Cumulative sum of squares for the block, continuing the running total
+        if len(self._block_sumsq) < n:
+            self._block_sumsq = np.empty(n, dtype=np.float64)
+        cum = self._block_sumsq[:n]
+        np.multiply(block, block, out=cum, dtype=np.float64)
+        np.cumsum(cum, out=cum)
+        cum += self._total_sumsq
+        self._total_sumsq = float(cum[-1])
+
+        if end <= len(self._ring):
+            np.copyto(self._ring[start:end], block)
+            self._cum_sumsq[start:end] = cum
+        else:
+            # Wrap around: split the block across the end and start of the ring
+            k = len(self._ring) - start
+            np.copyto(self._ring[start:], block[:k])
+            np.copyto(self._ring[:n - k], block[k:])
+            self._cum_sumsq[start:] = cum[:k]
+            self._cum_sumsq[:n - k] = cum[k:]
+
+        # Publish the new samples to the detection loop
+        self._write_idx += n
+
+        # Wake the detection loop once per hop
+        self._samples_since_hop += n
+        if self._samples_since_hop >= self._hop_samples:
+            self._samples_since_hop %= self._hop_samples
+            self._hop_event.set()
+
+    def read_latest(
+        self,
+        n_samples: int,
+        end_idx: Optional[int] = None,
+        out: Optional[np.ndarray] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Return the most recent n_samples of audio as float32 in [-1, 1),
+        oldest first, or None until enough audio has been captured.
+
+        The samples are converted and scaled from the ring's storage dtype
+        in a single pass (two slices when the window wraps).
+
+        Args:
+            n_samples: Window length
+            end_idx: Read the window ending at this write position instead
+                of the current one (to match a prior window_rms call)
+            out: Preallocated (n_samples,) float32 array to write into
+                instead of allocating a new one
+        """
+        if end_idx is None:
+            end_idx = self._write_idx
+        if end_idx < n_samples:
+            return None
+
+        start = (end_idx - n_samples) & self._ring_mask
+        end = start + n_samples
+
+        if out is None:
+            out = np.empty(n_samples, dtype=np.float32)
+
+        if end <= len(self._ring):
+            np.multiply(self._ring[start:end], self._sample_scale, out=out, dtype=np.float32)
+        else:
+            k = len(self._ring) - start
+            np.multiply(self._ring[start:], self._sample_scale, out=out[:k], dtype=np.float32)
+            np.multiply(self._ring[:end - len(self._ring)], self._sample_scale, out=out[k:], dtype=np.float32)
+        return out
+
+    def window_rms(self, n_samples: int, end_idx: Optional[int] = None) -> Optional[float]:
+        """
+        RMS of the most recent n_samples, in O(1) from the running sum of
+        squares (None until enough audio has been captured).
+        """
+        if end_idx is None:
+            end_idx = self._write_idx
+        if end_idx < n_samples:
+            return None
 
-    def _energy_prefilter(self, audio: np.ndarray) -> bool:
+        total = self._cum_sumsq[(end_idx - 1) & self._ring_mask]
+        before = self._cum_sumsq[(end_idx - n_samples - 1) & self._ring_mask] if end_idx > n_samples else 0.0
+        return math.sqrt(max(total - before, 0.0) / n_samples) * self._sample_scale
+
+    def _energy_prefilter(self, n_samples: int, end_idx: Optional[int] = None) -> bool:
         """
         Quick energy check before running neural network.
 
-        Returns True if audio has enough energy to potentially be a cough.
-        This is much faster than running the full neural network.
+        Returns True if the latest n_samples have enough energy to
+        potentially be a cough. This is a scalar comparison on the running
+        sum of squares, so silent windows are never even read.
         """
         if not self.config.use_energy_prefilter:
             return True
 
-        rms = np.sqrt(np.mean(audio ** 2))
-        return rms >= self.config.energy_threshold
+        rms = self.window_rms(n_samples, end_idx)
+        return rms is not None and rms >= self.config.energy_threshold
+
+    def _frame_aligned_end(self) -> int:
+        """
+        Current write position for the next window.
+
+        Once the incremental numpy features are in use (the pipeline has no
+        on-graph waveform path), it is rounded down to a multiple of the STFT
+        hop so successive windows share STFT frames, at the cost of up to one
+        hop of latency. The on-graph path gets the latest samples unaligned.
+        """
+        end_idx = self._write_idx
+        if self._mel_cache_end is None:
+            return end_idx
+        return end_idx - end_idx % self.extractor.config.hop_length
+
+    def _extract_features(self, window: np.ndarray, end_idx: int) -> np.ndarray:
+        """Normalized MFCCs for the window ending at end_idx, reusing the
+        STFT frames it shares with the previous window."""
+        shift = None if self._mel_cache_end is None else end_idx - self._mel_cache_end
+        features, self._mel_cache = self.extractor.extract_incremental(
+            window, shift, self._mel_cache, sr=self.config.sample_rate
+        )
+        self._mel_cache_end = end_idx
+        return features
+
+    def _predict_window(self, window: np.ndarray, end_idx: int) -> dict:
+        """
+        Run the pipeline on the window ending at end_idx.
+
+        Uses the on-graph MFCC path (pipeline.predict_waveform) when the
+        models support it, otherwise incremental numpy features. The
+        pipeline's energy gate only applies with the pre-filter enabled.
+        """
+        gate_threshold = self.config.energy_threshold if self.config.use_energy_prefilter else None
+        result = self.pipeline.predict_waveform(window, gate_threshold=gate_threshold)
+        if result is None:
+            features = self._extract_features(window, end_idx)
+            result = self.pipeline.predict(features)
+        return result
+
+    def _tick(self):
+        """Count a window without a cough; print a batch of dots every
+        _tick_stride windows."""
+        self._tick_count += 1
+        if self._tick_count % self._tick_stride == 0:
+            sys.stdout.write("." * self._tick_stride)
+            sys.stdout.flush()
+
+    def _wait_for_hop(self, timeout: float = 1.0) -> bool:
+        """
+        Block until the audio callback signals a new hop of samples.
+
+        Returns False on timeout (e.g. the stream stalled or is stopping).
+        """
+        if not self._hop_event.wait(timeout):
+            return False
+        self._hop_event.clear()
+        return True
+
+    def _pin_detection_thread(self):
+        """Pin the calling thread to config.detection_cpu (Linux only)."""
+        cpu = self.config.detection_cpu
+        if cpu is None or not hasattr(os, 'sched_setaffinity'):
+            return
+        try:
+            # pid 0 targets the calling thread on Linux
+            os.sched_setaffinity(0, {cpu})
+            print(f"✓ Detection thread pinned to CPU {cpu}")
+        except OSError as e:
+            print(f"⚠️  Could not pin detection thread to CPU {cpu}: {e}")
 
     def _detection_loop(self):
         """
         Continuous detection loop.
 
-        Runs in separate thread, periodically checks buffer for coughs.
+        Runs in separate thread and checks the buffer for coughs each time
+        the audio callback signals a new hop of samples.
         """
-        detection_samples = int(self.config.detection_window * self.config.sample_rate)
-        hop_samples = int(self.config.hop_length * self.config.sample_rate)
-        hop_blocks = max(1, int(hop_samples / self.config.block_size))
-
-        blocks_waited = 0
+        self._pin_detection_thread()
+        detection_samples = self._detection_samples
 
         print("\n" + "=" * 70)
         print("NEURAL NETWORK DETECTION ACTIVE")
@@ -155,46 +396,30 @@ class LiveCoughDetector:
         print("=" * 70 + "\n")
 
         while self.is_running:
-            # Wait for hop duration
-            if blocks_waited < hop_blocks:
-                time.sleep(0.1)
-                blocks_waited += 1
+            # Wait for the next hop of audio
+            if not self._wait_for_hop():
                 continue
 
-            blocks_waited = 0
-
-            # Get current buffer
-            with self.buffer_lock:
-                if len(self.display_buffer) < 1:
-                    continue
-                buffer_copy = list(self.display_buffer)
-
-            # Concatenate buffer
-            full_buffer = np.concatenate(buffer_copy)
-
-            # Get detection window
-            if len(full_buffer) < detection_samples:
+            # Snapshot the write position so the energy check and the
+            # window cover the same samples
+            end_idx = self._frame_aligned_end()
+            if end_idx < detection_samples:
                 continue
 
-            window = full_buffer[-detection_samples:]
-
             # Update statistics
             self.total_windows_processed += 1
 
             # Energy pre-filter (optional fast check)
-            if not self._energy_prefilter(window):
-                print(".", end="", flush=True)  # Indicate processing
+            if not self._energy_prefilter(detection_samples, end_idx):
+                self._tick()  # Indicate processing
                 continue
 
-            # Extract MFCC features
-            try:
-                features = self.extractor.extract_normalized(
-                    window,
-                    sr=self.config.sample_rate
-                )
+            # Get detection window (latest samples from the ring buffer)
+            window = self.read_latest(detection_samples, end_idx, out=self._window_buf)
 
-                # Run neural network pipeline
-                result = self.pipeline.predict(features)
+            # Extract MFCC features and run neural network pipeline
+            try:
+                result = self._predict_window(window, end_idx)
 
                 # Check if cough detected
                 if result['is_cough']:
@@ -213,15 +438,14 @@ class LiveCoughDetector:
                     # Save detection
                     if self.config.save_detections:
                         self.save_queue.put({
-                            'audio': window,
-                            'features': features,
+                            'audio': window.copy(),
                             'result': result,
                             'timestamp': time.time()
                         })
 
                 else:
                     # No cough detected
-                    print(".", end="", flush=True)
+                    self._tick()
 
             except Exception as e:
                 print(f"\nError in detection: {e}")
@@ -243,12 +467,19 @@ class LiveCoughDetector:
                 cough_type = item['result']['cough_type']
                 confidence = item['result']['classification_confidence']
 
-                filename = f"{timestamp}_{cough_type}_conf{confidence:.2f}.csv"
+                filename = f"{timestamp}_{cough_type}_conf{confidence:.2f}.wav"
                 filepath = os.path.join(self.config.save_dir, filename)
 
-                # Save audio
-                df = pd.DataFrame(item['audio'])
-                df.to_csv(filepath, header=False, index=False)
+                # Save audio as a WAV (binary, playable, and readable by the
+                # training data loader): 16-bit captures go back to their
+                # exact int16 samples, anything else as float32
+                audio = np.asarray(item['audio'], dtype=np.float32)
+                if self._ring.dtype == np.int16:
+                    audio = np.rint(audio / self._sample_scale).astype(np.int16)
+                    subtype = 'PCM_16'
+                else:
+                    subtype = 'FLOAT'
+                sf.write(filepath, audio, self.config.sample_rate, subtype=subtype)
 
                 print(f"💾 Saved: {filename}")
 
@@ -298,6 +529,7 @@ class LiveCoughDetector:
 
         # Stop detection thread
         self.is_running = False
+        self._hop_event.set()  # Wake the detection loop so it can exit
         if self.detection_thread:
             self.detection_thread.join(timeout=2)
 
@@ -343,10 +575,10 @@ def main():
 
     parser = argparse.ArgumentParser(description='Live cough detection')
     parser.add_argument('--detection_model', type=str,
-                        default='hardware/AI/models/detection_model_best.h5',
+                        default='hardware/AI/models/detection_model_best.keras',
                         help='Path to detection model')
     parser.add_argument('--classification_model', type=str,
-                        default='hardware/AI/models/classification_model_best.h5',
+                        default='hardware/AI/models/classification_model_best.keras',
                         help='Path to classification model')
     parser.add_argument('--confidence', type=float, default=0.7,
                         help='Detection confidence threshold')
@@ -354,6 +586,10 @@ def main():
                         help='Disable energy pre-filter')
     parser.add_argument('--no_save', action='store_true',
                         help='Disable saving detections')
+    parser.add_argument('--cpu', type=int, default=None,
+                        help='Pin the detection thread to this CPU core (Linux only)')
+    parser.add_argument('--no_thread_limit', action='store_true',
+                        help="Keep TensorFlow's default thread pools")
 
     args = parser.parse_args()
 
@@ -363,7 +599,9 @@ def main():
         classification_model_path=args.classification_model,
         detection_confidence=args.confidence,
         use_energy_prefilter=not args.no_prefilter,
-        save_detections=not args.no_save
+        save_detections=not args.no_save,
+        detection_cpu=args.cpu,
+        limit_tf_threads=not args.no_thread_limit
     )
 
     # Create detector
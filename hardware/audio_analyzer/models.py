@@ -4,6 +4,9 @@ Neural Network Models for Cough Detection and Classification
 Stage 1: Detection Model - Binary classification (cough vs non-cough)
 Stage 2: Classification Model - Multi-class classification (cough types/bins)
 """
+import os
+import tempfile
+import numpy as np
 import tensorflow as tf
 
 # Handle Keras import for different TensorFlow versions
@@ -14,11 +17,333 @@ except (ImportError, AttributeError):
     import keras
     from keras import layers, models
 
+# TF-TRT is only available in GPU builds of TensorFlow
+try:
+    from tensorflow.python.compiler.tensorrt import trt_convert as trt
+except ImportError:
+    trt = None
+
 from typing import Tuple, Optional
 from config import detection_config, classification_config, mfcc_config, audio_config
+from feature_extraction import TFMFCCExtractor
 import json
 from pathlib import Path
 
+# Trained models are saved in the Keras v3 format; older ones are HDF5
+MODEL_SUFFIXES = ('.keras', '.h5')
+
+
+def resolve_model_path(model_path: str) -> str:
+    """
+    Return model_path, or its sibling with the other Keras suffix
+    (.keras / .h5) when only that one exists, so default paths keep working
+    for models saved in either format.
+    """
+    path = Path(model_path)
+    if path.exists() or path.suffix not in MODEL_SUFFIXES:
+        return model_path
+    for suffix in MODEL_SUFFIXES:
+        if path.with_suffix(suffix).exists():
+            return str(path.with_suffix(suffix))
+    return model_path
+
+
+class TFLiteModel:
+    """
+    Minimal stand-in for a Keras model backed by a TFLite interpreter.
+
+    Exposes predict(features, verbose=0) so CoughDetectionModel and
+    CoughClassificationModel can use it in place of their Keras model.
+    Quantized (int8) inputs and outputs are converted transparently.
+    Models exported with a fixed batch of 1 (see convert_to_tflite_int8)
+    are run one window at a time; otherwise the batch dimension is resized.
+    """
+
+    def __init__(self, model_path: str, num_threads: Optional[int] = None):
+        self.model_path = model_path
+        self.interpreter = tf.lite.Interpreter(
+            model_path=model_path,
+            num_threads=num_threads or os.cpu_count()
+        )
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.input_shape = tuple(self._input['shape'])
+        self._static_batch = self._input['shape_signature'][0] != -1
+
+    def _resize(self, batch_size: int):
+        """Resize the interpreter's batch dimension if it changed."""
+        if self._input['shape'][0] == batch_size:
+            return
+        self.interpreter.resize_tensor_input(
+            self._input['index'], [batch_size, *self._input['shape'][1:]]
+        )
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+
+    def predict(self, features, verbose: int = 0) -> np.ndarray:
+        """Run inference on a batch of features; returns float32 outputs."""
+        features = np.asarray(features, dtype=np.float32)
+
+        if self._static_batch:
+            return np.concatenate([self._invoke(features[i:i + 1]) for i in range(len(features))])
+
+        self._resize(len(features))
+        return self._invoke(features)
+
+    def _invoke(self, features: np.ndarray) -> np.ndarray:
+        """Run the interpreter on a batch matching its current input shape."""
+        if self._input['dtype'] == np.int8:
+            scale, zero_point = self._input['quantization']
+            features = np.clip(np.round(features / scale + zero_point), -128, 127).astype(np.int8)
+
+        self.interpreter.set_tensor(self._input['index'], features)
+        self.interpreter.invoke()
+        output = self.interpreter.get_tensor(self._output['index'])
+
+        if self._output['dtype'] == np.int8:
+            scale, zero_point = self._output['quantization']
+            output = (output.astype(np.float32) - zero_point) * scale
+
+        return output
+
+    def predict_on_batch(self, features) -> np.ndarray:
+        """Alias of predict() matching the Keras API."""
+        return self.predict(features)
+
+
+class TensorRTModel:
+    """
+    Minimal stand-in for a Keras model backed by a TF-TRT SavedModel.
+
+    Exposes predict(features, verbose=0) like TFLiteModel, calling the
+    SavedModel's serving_default signature.
+    """
+
+    def __init__(self, saved_model_dir: str):
+        self.saved_model_dir = saved_model_dir
+        self._loaded = tf.saved_model.load(saved_model_dir)
+        self._fn = self._loaded.signatures['serving_default']
+        self._input_name = list(self._fn.structured_input_signature[1].keys())[0]
+        self._output_name = list(self._fn.structured_outputs.keys())[0]
+
+    def predict(self, features, verbose: int = 0) -> np.ndarray:
+        """Run inference on a batch of features; returns float32 outputs."""
+        features = tf.convert_to_tensor(features, dtype=tf.float32)
+        return self._fn(**{self._input_name: features})[self._output_name].numpy()
+
+    def predict_on_batch(self, features) -> np.ndarray:
+        """Alias of predict() matching the Keras API."""
+        return self.predict(features)
+
+
+def convert_to_tensorrt(
+    h5_path: str,
+    output_dir: Optional[str] = None,
+    precision: str = 'FP16'
+) -> str:
+    """
+    Convert a saved Keras model to a TF-TRT optimized SavedModel.
+
+    Requires a GPU build of TensorFlow with TensorRT.
+
+    Args:
+        h5_path: Path to the trained Keras model (.keras or .h5)
+        output_dir: Where to write the TF-TRT SavedModel (default: next to
+            the model, named <model>_trt_<precision>)
+        precision: 'FP32', 'FP16' or 'INT8'
+
+    Returns:
+        Path of the TF-TRT SavedModel directory
+    """
+    if trt is None:
+        raise ImportError("TF-TRT is not available in this TensorFlow build")
+
+    h5_path = Path(h5_path)
+    if output_dir is None:
+        output_dir = str(h5_path.with_name(f"{h5_path.stem}_trt_{precision.lower()}"))
+
+    # TF-TRT converts SavedModels, so export the Keras model first (to a
+    # temporary directory, removed once the converted model is saved)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        saved_model_dir = os.path.join(tmp_dir, 'saved_model')
+        keras.models.load_model(str(h5_path)).save(saved_model_dir)
+
+        converter = trt.TrtGraphConverterV2(
+            input_saved_model_dir=saved_model_dir,
+            precision_mode=getattr(trt.TrtPrecisionMode, precision.upper()),
+            max_workspace_size_bytes=2 << 30
+        )
+        converter.convert()
+        converter.save(output_dir)
+
+    print(f"TF-TRT ({precision}) model saved to: {output_dir}")
+    return output_dir
+
+
+def convert_to_tflite_int8(
+    h5_path: str,
+    representative_features,
+    output_path: Optional[str] = None
+) -> str:
+    """
+    Convert a saved Keras model to a fully int8-quantized TFLite model.
+
+    Args:
+        h5_path: Path to the trained Keras model (.keras or .h5)
+        representative_features: Iterable of MFCC feature windows
+            (n_features, n_frames) used to calibrate quantization ranges;
+            a few hundred validation windows is enough
+        output_path: Where to write the .tflite file (default: next to
+            the model with the same name)
+
+    Returns:
+        Path of the written .tflite model
+    """
+    if output_path is None:
+        output_path = str(Path(h5_path).with_suffix('.tflite'))
+
+    model = keras.models.load_model(h5_path)
+
+    def representative_dataset():
+        for features in representative_features:
+            yield [np.asarray(features, dtype=np.float32)[np.newaxis]]
+
+    # Rebuild with a static batch of 1: the LSTM's tensor-list ops can only
+    # be lowered to TFLite builtins when every shape is known. TFLiteModel
+    # runs such models one window at a time.
+    static_model = keras.models.clone_model(
+        model,
+        input_tensors=keras.Input(batch_shape=(1, *model.input_shape[1:]))
+    )
+    static_model.set_weights(model.get_weights())
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(static_model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+
+    # Convert before opening the output so a failed conversion leaves no
+    # empty .tflite behind for CoughDetectionPipeline.load to pick up
+    tflite_model = converter.convert()
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+
+    print(f"INT8 TFLite model saved to: {output_path}")
+    return output_path
+
+
+def _jit_concrete_function(fn, *input_signature):
+    """
+    Trace fn into an XLA-compiled concrete function for input_signature.
+
+    The function is run once on zeros so an op XLA cannot compile shows up
+    here rather than on the first real window; in that case the plain graph
+    is returned instead.
+    """
+    jit_fn = tf.function(fn, jit_compile=True).get_concrete_function(*input_signature)
+    try:
+        jit_fn(*[tf.zeros(spec.shape, spec.dtype) for spec in input_signature])
+        return jit_fn
+    except (tf.errors.InvalidArgumentError, tf.errors.UnimplementedError) as e:
+        print(f"⚠️  XLA compilation failed, using the plain graph: {e.message.splitlines()[0]}")
+        return tf.function(fn).get_concrete_function(*input_signature)
+
+
+def _predict_single(owner, features) -> np.ndarray:
+    """
+    Run owner.model on a single batched window without the predict() loop.
+
+    Keras models are traced once into an XLA-compiled concrete function for
+    a fixed (1, n_features, n_frames) float32 input and cached on the owner, so each
+    call goes straight to the graph without tf.function's signature
+    matching; any other model object (e.g. TFLiteModel) falls back to its
+    predict().
+    """
+    model = owner.model
+    if not isinstance(model, keras.Model):
+        return model.predict(features, verbose=0)
+
+    if getattr(owner, '_single_fn_model', None) is not model:
+        owner._single_fn = _jit_concrete_function(
+            lambda x: model(x, training=False),
+            tf.TensorSpec([1, *model.input_shape[1:]], tf.float32)
+        )
+        owner._single_fn_model = model
+
+    return owner._single_fn(tf.cast(features, tf.float32)).numpy()
+
+
+def fold_batchnorm(model: keras.Model) -> keras.Model:
+    """
+    Fold inference-mode BatchNormalization layers into the Conv1D before them.
+
+    BN at inference is the per-channel affine y = a*x + s with
+    a = gamma / sqrt(var + eps) and s = beta - mean * a. For a Conv1D with a
+    linear activation both terms fold into the kernel and bias and the BN
+    becomes an identity. Our conv blocks apply ReLU before BN; there only
+    the scale can move into the conv (relu(a*z) == a*relu(z) needs a > 0),
+    so the BN is replaced by a single per-channel offset. Pairs that fit
+    neither case are left untouched.
+
+    Args:
+        model: Loaded Keras model (not modified)
+
+    Returns:
+        Equivalent model for inference, or the input model if nothing folds
+    """
+    folded = {}      # layer name -> new weights
+    replaced = {}    # BN name -> replacement layer
+
+    for prev, layer in zip(model.layers, model.layers[1:]):
+        if not (isinstance(layer, layers.BatchNormalization) and isinstance(prev, layers.Conv1D)):
+            continue
+        axis = layer.axis[0] if isinstance(layer.axis, (list, tuple)) else layer.axis
+        if axis not in (-1, len(layer.input.shape) - 1) or not prev.use_bias:
+            continue
+
+        gamma, beta, mean, var = (
+            layer.gamma.numpy() if layer.scale else 1.0,
+            layer.beta.numpy() if layer.center else 0.0,
+            layer.moving_mean.numpy(),
+            layer.moving_variance.numpy(),
+        )
+        scale = gamma / np.sqrt(var + layer.epsilon)
+        shift = beta - mean * scale
+        kernel, bias = prev.get_weights()
+
+        activation = keras.activations.serialize(prev.activation)
+        activation = activation if isinstance(activation, str) else activation.get('config', activation)
+        if activation == 'linear':
+            folded[prev.name] = [kernel * scale, bias * scale + shift]
+            replaced[layer.name] = layers.Activation('linear', name=layer.name)
+        elif activation == 'relu' and np.all(scale > 0):
+            folded[prev.name] = [kernel * scale, bias * scale]
+            replaced[layer.name] = layers.Rescaling(1.0, offset=shift.astype(np.float32).tolist(), name=layer.name)
+
+    if not replaced:
+        return model
+
+    # Both models are single-path chains, so rebuild layer by layer
+    if any(layer.input is not prev.output for prev, layer in zip(model.layers, model.layers[1:])):
+        return model
+
+    inputs = layers.Input(batch_shape=model.input_shape)
+    x = inputs
+    for layer in model.layers[1:]:
+        new_layer = replaced.get(layer.name) or layer.__class__.from_config(layer.get_config())
+        x = new_layer(x)
+        if layer.name not in replaced:
+            new_layer.set_weights(folded.get(layer.name) or layer.get_weights())
+    clone = keras.Model(inputs, x, name=model.name)
+
+    print(f"✓ Folded {len(replaced)} BatchNormalization layer(s) into Conv1D weights")
+    return clone
+
+
 class CoughDetectionModel:
     """
     Stage 1: Lightweight cough detection model.
@@ -81,15 +406,16 @@ class CoughDetectionModel:
         x = layers.Dense(64, activation='relu', name='dense_1')(x)
         x = layers.Dropout(self.config.dropout, name='dropout_final')(x)
 
-        # Output layer (sigmoid for binary classification)
-        outputs = layers.Dense(1, activation='sigmoid', name='output')(x)
+        # Output layer (sigmoid for binary classification), kept in float32
+        # under a mixed-precision policy
+        outputs = layers.Dense(1, activation='sigmoid', dtype='float32', name='output')(x)
 
         model = models.Model(inputs=inputs, outputs=outputs, name='CoughDetector')
 
         return model
 
     def compile(self, learning_rate: Optional[float] = None):
-        """Compile the model with optimizer and loss."""
+        """Compile the model with optimizer and loss (XLA-compiled steps)."""
         lr = learning_rate or self.config.learning_rate
 
         self.model.compile(
@@ -100,7 +426,8 @@ class CoughDetectionModel:
                 keras.metrics.Precision(name='precision'),
                 keras.metrics.Recall(name='recall'),
                 keras.metrics.AUC(name='auc', num_thresholds=200)
-            ]
+            ],
+            jit_compile=True
         )
 
     def summary(self):
@@ -130,12 +457,30 @@ class CoughDetectionModel:
             features = tf.expand_dims(features, 0)
 
         # Get prediction
-        prob = self.model.predict(features, verbose=0)[0][0]
+        prob = _predict_single(self, features)[0][0]
 
         is_cough = prob >= threshold
 
         return is_cough, float(prob)
 
+    def predict_batch(self, features: tf.Tensor, threshold: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Predict cough presence for a batch of feature windows.
+
+        Args:
+            features: MFCC features (shape: (batch, n_features, n_frames))
+            threshold: Confidence threshold (default from config)
+
+        Returns:
+            is_cough: Boolean array, one entry per window
+            confidence: Probability scores
+        """
+        threshold = threshold or self.config.confidence_threshold
+
+        probs = np.asarray(self.model.predict_on_batch(features))[:, 0]
+
+        return probs >= threshold, probs
+
 
 class CoughClassificationModel:
     """
@@ -189,10 +534,13 @@ class CoughClassificationModel:
 
             x = layers.Dropout(self.config.dropout, name=f'dropout_{i+1}')(x)
 
-        # LSTM layer to capture temporal dependencies
+        # LSTM layer to capture temporal dependencies. After pooling the
+        # sequence is only a few fixed steps long, so it is unrolled into a
+        # static graph instead of a while loop (fuses under XLA and TFLite)
         x = layers.LSTM(
             units=self.config.lstm_units,
             return_sequences=False,
+            unroll=True,
             name='lstm'
         )(x)
 
@@ -206,6 +554,7 @@ class CoughClassificationModel:
         outputs = layers.Dense(
             self.config.num_bins,
             activation='softmax',
+            dtype='float32',  # stable softmax under mixed precision
             name='output'
         )(x)
 
@@ -214,7 +563,7 @@ class CoughClassificationModel:
         return model
 
     def compile(self, learning_rate: Optional[float] = None):
-        """Compile the model with optimizer and loss."""
+        """Compile the model with optimizer and loss (XLA-compiled steps)."""
         lr = learning_rate or self.config.learning_rate
 
         self.model.compile(
@@ -224,7 +573,8 @@ class CoughClassificationModel:
                 'accuracy',
                 keras.metrics.CategoricalAccuracy(name='cat_accuracy'),
                 keras.metrics.TopKCategoricalAccuracy(k=2, name='top_2_accuracy')
-            ]
+            ],
+            jit_compile=True
         )
 
     def summary(self):
@@ -252,7 +602,7 @@ class CoughClassificationModel:
             features = tf.expand_dims(features, 0)
 
         # Get prediction
-        probs = self.model.predict(features, verbose=0)[0]
+        probs = _predict_single(self, features)[0]
 
         # Get predicted class
         bin_id = int(tf.argmax(probs))
@@ -261,6 +611,26 @@ class CoughClassificationModel:
 
         return bin_id, bin_name, confidence
 
+    def predict_batch(self, features: tf.Tensor) -> Tuple[np.ndarray, list, np.ndarray]:
+        """
+        Predict cough type/bin for a batch of feature windows.
+
+        Args:
+            features: MFCC features (shape: (batch, n_features, n_frames))
+
+        Returns:
+            bin_ids: Predicted bin index per window
+            bin_names: Bin name per window
+            confidences: Probability of the predicted class per window
+        """
+        probs = np.asarray(self.model.predict_on_batch(features))
+
+        bin_ids = np.argmax(probs, axis=1)
+        confidences = probs[np.arange(len(bin_ids)), bin_ids]
+        bin_names = [self.config.bin_names[i] for i in bin_ids]
+
+        return bin_ids, bin_names, confidences
+
 
 class CoughDetectionPipeline:
     """
@@ -275,16 +645,33 @@ class CoughDetectionPipeline:
         self.detection_model = detection_model
         self.classification_model = classification_model
 
-    def predict(self, features: tf.Tensor) -> dict:
+    def predict(self, features: tf.Tensor, audio: Optional[np.ndarray] = None) -> dict:
         """
         Run complete pipeline: detection -> classification.
 
         Args:
             features: MFCC features
+            audio: Raw audio window the features came from. If given, windows
+                quieter than audio_config.energy_gate_threshold (RMS) are
+                rejected without running either model.
 
         Returns:
             Dictionary with prediction results
         """
+        # Stage 0: Energy gate
+        if audio is not None:
+            gated = self._energy_gate(audio, audio_config.energy_gate_threshold)
+            if gated is not None:
+                return gated
+
+        # Both stages in one graph call when both models are Keras models
+        fused_fn = self._fused_predict_fn()
+        if fused_fn is not None:
+            x = tf.convert_to_tensor(features, dtype=tf.float32)
+            if len(x.shape) == 2:
+                x = tf.expand_dims(x, 0)
+            return self._predict_fused(fused_fn, x)
+
         # Stage 1: Detection
         is_cough, detection_conf = self.detection_model.predict(features)
 
@@ -308,6 +695,224 @@ class CoughDetectionPipeline:
 
         return result
 
+    @staticmethod
+    def _energy_gate(audio: np.ndarray, threshold: float) -> Optional[dict]:
+        """Result for a window quieter than threshold (RMS), or None if the
+        models should run."""
+        if threshold <= 0:
+            return None
+        audio = np.asarray(audio, dtype=np.float32).ravel()
+        rms = np.sqrt(np.dot(audio, audio) / max(audio.size, 1))
+        if rms >= threshold:
+            return None
+        return {
+            'is_cough': False,
+            'detection_confidence': 0.0,
+            'cough_type': None,
+            'cough_type_id': None,
+            'classification_confidence': None,
+            'gated': True
+        }
+
+    def predict_waveform(
+        self,
+        audio: np.ndarray,
+        gate_threshold: Optional[float] = None
+    ) -> Optional[dict]:
+        """
+        Run the pipeline on a raw audio window, with MFCC extraction in the
+        same graph as both models.
+
+        The window goes into a single XLA-compiled function (TFMFCCExtractor
+        -> detection -> tf.cond(classification)), so the features never
+        leave TensorFlow.
+
+        Args:
+            audio: 1-D audio window at audio_config.sample_rate
+            gate_threshold: If given, windows quieter than this (RMS) are
+                rejected without running either model. Off by default, since
+                callers usually gate on a running RMS of their own
+
+        Returns:
+            Dictionary with prediction results (as predict()), or None if the
+            models are not both Keras models or the window length does not
+            produce the model's number of frames; use predict() instead then
+        """
+        if gate_threshold is not None:
+            gated = self._energy_gate(audio, gate_threshold)
+            if gated is not None:
+                return gated
+
+        audio = np.asarray(audio, dtype=np.float32).ravel()
+        wave_fn = self._waveform_predict_fn(audio.size)
+        if wave_fn is None:
+            return None
+        return self._predict_fused(wave_fn, tf.constant(audio))
+
+    def warmup(self, n_samples: Optional[int] = None):
+        """
+        Build and run the inference graphs once on zeros, so tracing, XLA
+        compilation and allocator setup happen before the first real window.
+
+        Args:
+            n_samples: Live window length; if the on-graph waveform path is
+                available for it, that is the graph warmed up. Otherwise the
+                feature-input path is warmed.
+        """
+        if n_samples is not None and self._waveform_predict_fn(n_samples) is not None:
+            return
+
+        # _jit_concrete_function already runs the fused graph once
+        if self._fused_predict_fn() is not None:
+            return
+
+        features = np.zeros((1, *self.detection_model.input_shape), dtype=np.float32)
+        self.detection_model.predict(features)
+        self.classification_model.predict(features)
+
+    def _waveform_predict_fn(self, n_samples: int):
+        """
+        Concrete function taking an (n_samples,) waveform and a threshold,
+        computing normalized MFCCs on-graph and then running the fused
+        detection + classification step (XLA-compiled, see
+        _jit_concrete_function). Cached per window length.
+        """
+        detection = self.detection_model.model
+        classification = self.classification_model.model
+        if not (isinstance(detection, keras.Model) and isinstance(classification, keras.Model)):
+            return None
+
+        cached = getattr(self, '_wave_models', None)
+        if cached is not None and cached[0] is detection and cached[1] is classification and cached[2] == n_samples:
+            return self._wave_fn
+
+        extractor = TFMFCCExtractor(n_samples, sr=audio_config.sample_rate)
+        if extractor.n_frames != detection.input_shape[-1]:
+            return None
+        run_pipeline = self._pipeline_graph(detection, classification)
+
+        def run_waveform(audio, threshold):
+            features = extractor.extract_normalized(audio[tf.newaxis])
+            return run_pipeline(features, threshold)
+
+        wave_fn = _jit_concrete_function(
+            run_waveform,
+            tf.TensorSpec([n_samples], tf.float32),
+            tf.TensorSpec([], tf.float32)
+        )
+
+        self._wave_fn = wave_fn
+        self._wave_models = (detection, classification, n_samples)
+        return wave_fn
+
+    @staticmethod
+    def _pipeline_graph(detection, classification):
+        """Detection followed by classification under tf.cond, on a
+        (1, n_features, n_frames) input."""
+        num_bins = classification.output_shape[-1]
+
+        def run_pipeline(x, threshold):
+            detection_prob = tf.cast(detection(x, training=False)[0, 0], tf.float32)
+            is_cough = detection_prob >= threshold
+            class_probs = tf.cond(
+                is_cough,
+                lambda: tf.cast(classification(x, training=False)[0], tf.float32),
+                lambda: tf.zeros([num_bins], tf.float32)
+            )
+            return detection_prob, is_cough, class_probs
+
+        return run_pipeline
+
+    def _fused_predict_fn(self):
+        """
+        XLA-compiled concrete function running detection and, through
+        tf.cond, only when it fires, classification on the same
+        (1, n_features, n_frames) input.
+
+        Returns None unless both models are Keras models (TFLite/TF-TRT
+        models go through their own predict()). Rebuilt if a model is swapped.
+        """
+        detection = self.detection_model.model
+        classification = self.classification_model.model
+        if not (isinstance(detection, keras.Model) and isinstance(classification, keras.Model)):
+            return None
+
+        cached = getattr(self, '_fused_models', None)
+        if cached is None or cached[0] is not detection or cached[1] is not classification:
+            self._fused_fn = _jit_concrete_function(
+                self._pipeline_graph(detection, classification),
+                tf.TensorSpec([1, *detection.input_shape[1:]], tf.float32),
+                tf.TensorSpec([], tf.float32)
+            )
+            self._fused_models = (detection, classification)
+
+        return self._fused_fn
+
+    def _predict_fused(self, fused_fn, x: tf.Tensor) -> dict:
+        """Run a fused detection + classification graph on its input x."""
+        threshold = tf.constant(self.detection_model.config.confidence_threshold, tf.float32)
+        detection_prob, is_cough, class_probs = fused_fn(x, threshold)
+        is_cough = bool(is_cough)
+
+        result = {
+            'is_cough': is_cough,
+            'detection_confidence': float(detection_prob),
+            'cough_type': None,
+            'cough_type_id': None,
+            'classification_confidence': None
+        }
+
+        if is_cough:
+            class_probs = class_probs.numpy()
+            bin_id = int(np.argmax(class_probs))
+            result.update({
+                'cough_type': self.classification_model.config.bin_names[bin_id],
+                'cough_type_id': bin_id,
+                'classification_confidence': float(class_probs[bin_id])
+            })
+
+        return result
+
+    def predict_batch(self, features: tf.Tensor) -> list:
+        """
+        Run the pipeline on a batch of feature windows.
+
+        Detection runs on the whole batch; classification runs once on just
+        the windows that were detected as coughs.
+
+        Args:
+            features: MFCC features (shape: (batch, n_features, n_frames))
+
+        Returns:
+            List of result dictionaries, one per window (same keys as predict)
+        """
+        features = np.asarray(features)
+        is_cough, detection_conf = self.detection_model.predict_batch(features)
+
+        results = [
+            {
+                'is_cough': bool(is_cough[i]),
+                'detection_confidence': float(detection_conf[i]),
+                'cough_type': None,
+                'cough_type_id': None,
+                'classification_confidence': None
+            }
+            for i in range(len(is_cough))
+        ]
+
+        cough_idx = np.flatnonzero(is_cough)
+        if len(cough_idx) > 0:
+            bin_ids, bin_names, class_conf = self.classification_model.predict_batch(features[cough_idx])
+
+            for j, i in enumerate(cough_idx):
+                results[i].update({
+                    'cough_type': bin_names[j],
+                    'cough_type_id': int(bin_ids[j]),
+                    'classification_confidence': float(class_conf[j])
+                })
+
+        return results
+
     def save(self, detection_path: str, classification_path: str):
         """Save both models."""
         self.detection_model.model.save(detection_path)
@@ -315,20 +920,9 @@ class CoughDetectionPipeline:
         print(f"Detection model saved to: {detection_path}")
         print(f"Classification model saved to: {classification_path}")
 
-    @classmethod
-    def load(cls, detection_path: str, classification_path: str):
-        """Load both models from disk."""
-        detection_keras = keras.models.load_model(detection_path)
-        classification_keras = keras.models.load_model(classification_path)
-
-        # Wrap in our classes
-        detection_model = CoughDetectionModel()
-        detection_model.model = detection_keras
-
-        classification_model = CoughClassificationModel()
-        classification_model.model = classification_keras
-
-        # Try to load class names for the classification model
+    @staticmethod
+    def _load_class_names(classification_model, classification_path: str):
+        """Apply class_names.json next to the classification model, if present."""
         class_names_path = Path(classification_path).parent / 'class_names.json'
         if class_names_path.exists():
             try:
@@ -342,6 +936,91 @@ class CoughDetectionPipeline:
             except Exception as e:
                 print(f"⚠️  Warning: Could not load or parse class_names.json: {e}")
 
+    @staticmethod
+    def _load_model_file(model_path: str):
+        """
+        Load a model, preferring a quantized .tflite sibling of the Keras
+        file (as written by convert_to_tflite_int8) when one exists.
+        """
+        model_path = resolve_model_path(model_path)
+        tflite_path = Path(model_path).with_suffix('.tflite')
+        if tflite_path.exists():
+            print(f"✓ Using TFLite model: {tflite_path}")
+            return TFLiteModel(str(tflite_path))
+        return fold_batchnorm(keras.models.load_model(model_path))
+
+    @classmethod
+    def load(cls, detection_path: str, classification_path: str):
+        """
+        Load both models from disk.
+
+        Either Keras format is accepted for each path: a missing .keras file
+        falls back to an .h5 of the same name and vice versa (see
+        resolve_model_path). If a .tflite file with the same name sits next
+        to the model, the
+        TFLite interpreter is used for that model instead of Keras. Keras
+        models have their BatchNormalization layers folded (see
+        fold_batchnorm).
+        """
+        # Wrap in our classes
+        detection_model = CoughDetectionModel()
+        detection_model.model = cls._load_model_file(detection_path)
+
+        classification_model = CoughClassificationModel()
+        classification_model.model = cls._load_model_file(classification_path)
+
+        # Try to load class names for the classification model
+        cls._load_class_names(classification_model, classification_path)
+
+        return cls(detection_model, classification_model)
+
+    @classmethod
+    def load_tflite(cls, detection_path: str, classification_path: str, num_threads: Optional[int] = None):
+        """
+        Load both models from .tflite files (see convert_to_tflite_int8).
+
+        Args:
+            detection_path: Path to the detection .tflite model
+            classification_path: Path to the classification .tflite model
+            num_threads: Interpreter threads (default: all CPUs)
+        """
+        detection_model = CoughDetectionModel()
+        detection_model.model = TFLiteModel(detection_path, num_threads=num_threads)
+
+        classification_model = CoughClassificationModel()
+        classification_model.model = TFLiteModel(classification_path, num_threads=num_threads)
+
+        cls._load_class_names(classification_model, classification_path)
+
+        return cls(detection_model, classification_model)
+
+    @classmethod
+    def load_tensorrt(cls, detection_path: str, classification_path: str, precision: str = 'FP16'):
+        """
+        Load both models as TF-TRT SavedModels, converting the Keras files on
+        first use (see convert_to_tensorrt).
+
+        Args:
+            detection_path: Path to the detection Keras model
+            classification_path: Path to the classification Keras model
+            precision: TF-TRT precision mode ('FP32', 'FP16' or 'INT8')
+        """
+        trt_models = []
+        for h5_path in (detection_path, classification_path):
+            h5_path = Path(resolve_model_path(h5_path))
+            trt_dir = h5_path.with_name(f"{h5_path.stem}_trt_{precision.lower()}")
+            if not trt_dir.exists():
+                convert_to_tensorrt(str(h5_path), str(trt_dir), precision=precision)
+            trt_models.append(TensorRTModel(str(trt_dir)))
+
+        detection_model = CoughDetectionModel()
+        detection_model.model = trt_models[0]
+
+        classification_model = CoughClassificationModel()
+        classification_model.model = trt_models[1]
+
+        cls._load_class_names(classification_model, classification_path)
+
         return cls(detection_model, classification_model)
 
 
@@ -9,6 +9,132 @@ import shutil
 from pathlib import Path
 import argparse
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+# fcntl is POSIX-only; without it reflink cloning is skipped
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Optional: pyahocorasick matches all filename patterns in one pass
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Linux FICLONE ioctl: make dst share src's extents on copy-on-write
+# filesystems (btrfs, XFS), so the copy costs no data I/O
+_FICLONE = 0x40049409
+
+
+def _scandir_wavs(root) -> Iterator[os.DirEntry]:
+    """
+    Recursively yield the .wav files under root as os.DirEntry objects.
+    The extension is matched case-insensitively, so recorder files named
+    *.WAV are found on every platform.
+
+    os.scandir returns the file type with each entry, so unlike
+    Path.rglob no extra stat() is needed per file. Directories that cannot
+    be read are skipped.
+    """
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from _scandir_wavs(entry.path)
+                elif entry.is_file() and entry.name.lower().endswith('.wav'):
+                    yield entry
+    except PermissionError:
+        print(f"⚠️  Skipping unreadable directory: {root}")
+
+
+def _fast_copy(src, dst):
+    """
+    Copy src to dst, including metadata (like shutil.copy2).
+
+    Tries a reflink clone first, then an in-kernel os.copy_file_range, and
+    falls back to shutil.copyfile (sendfile/fcopyfile where available).
+    """
+    copied = False
+    if fcntl is not None or hasattr(os, 'copy_file_range'):
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+
+            if fcntl is not None:
+                try:
+                    fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+                    copied = True
+                except OSError:
+                    pass
+
+            if not copied and hasattr(os, 'copy_file_range'):
+                try:
+                    remaining = os.fstat(src_fd).st_size
+                    while remaining > 0:
+                        n = os.copy_file_range(src_fd, dst_fd, remaining)
+                        if n == 0:
+                            break
+                        remaining -= n
+                    copied = remaining == 0
+                except OSError:
+                    pass
+
+    if not copied:
+        shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
+
+
+def _unique_name(name: str, used_names: set) -> str:
+    """
+    Return name, or name with the first free _<n> suffix, that is not in
+    used_names (the files already in the destination directory), and
+    record it there.
+    """
+    candidate = name
+    if candidate in used_names:
+        stem, suffix = os.path.splitext(name)
+        counter = 1
+        while candidate in used_names:
+            candidate = f"{stem}_{counter}{suffix}"
+            counter += 1
+    used_names.add(candidate)
+    return candidate
+
+
+def _pattern_matcher(category_mapping: dict):
+    """
+    Build a function mapping a lowercase file name to the category of the
+    first pattern (in category_mapping order) it contains, or None.
+
+    With pyahocorasick installed, all patterns are matched in a single pass
+    over the name through an Aho-Corasick automaton; otherwise each pattern
+    is checked in turn.
+    """
+    patterns = [(pattern.lower(), category) for pattern, category in category_mapping.items()]
+
+    if ahocorasick is not None and patterns and all(pattern for pattern, _ in patterns):
+        automaton = ahocorasick.Automaton()
+        for priority, (pattern, category) in enumerate(patterns):
+            # Keep the earliest mapping entry if two patterns coincide
+            if pattern not in automaton:
+                automaton.add_word(pattern, (priority, category))
+        automaton.make_automaton()
+
+        def match(filename: str) -> Optional[str]:
+            hit = min((value for _, value in automaton.iter(filename)), default=None)
+            return hit[1] if hit is not None else None
+
+        return match
+
+    def match(filename: str) -> Optional[str]:
+        for pattern, category in patterns:
+            if pattern in filename:
+                return category
+        return None
+
+    return match
 
 
 def organize_dataset_interactive(source_dir: str, output_dir: str):
@@ -29,7 +155,7 @@ def organize_dataset_interactive(source_dir: str, output_dir: str):
         return
 
     # Find all WAV files
-    wav_files = list(source_path.rglob("*.wav"))
+    wav_files = list(_scandir_wavs(source_path))
     print(f"\nFound {len(wav_files)} WAV files in {source_dir}")
 
     if len(wav_files) == 0:
@@ -70,6 +196,9 @@ def organize_dataset_interactive(source_dir: str, output_dir: str):
         category_dir = output_path / category
         category_dir.mkdir(exist_ok=True)
 
+    # Names already taken in each category, for duplicate handling
+    used_names = {category: set(os.listdir(output_path / category)) for category in categories}
+
     # Organize files
     print("\n" + "=" * 70)
     print("CATEGORIZING FILES")
@@ -102,19 +231,10 @@ def organize_dataset_interactive(source_dir: str, output_dir: str):
                 if 0 <= category_idx < len(categories):
                     category = categories[category_idx]
 
-                    # Copy file
-                    dest_file = output_path / category / wav_file.name
+                    # Copy file (renamed if the name is already taken)
+                    dest_file = output_path / category / _unique_name(wav_file.name, used_names[category])
 
-                    # Handle duplicate filenames
-                    if dest_file.exists():
-                        stem = dest_file.stem
-                        suffix = dest_file.suffix
-                        counter = 1
-                        while dest_file.exists():
-                            dest_file = output_path / category / f"{stem}_{counter}{suffix}"
-                            counter += 1
-
-                    shutil.copy2(wav_file, dest_file)
+                    _fast_copy(wav_file, dest_file)
                     stats[category] += 1
                     break
                 else:
@@ -125,12 +245,21 @@ def organize_dataset_interactive(source_dir: str, output_dir: str):
     print_stats(stats, categories)
 
 
-def organize_dataset_automatic(source_dir: str, output_dir: str, category_mapping: dict):
+def organize_dataset_automatic(
+    source_dir: str,
+    output_dir: str,
+    category_mapping: dict,
+    max_workers: Optional[int] = None
+):
     """
     Automatically organize files based on filename patterns.
 
     category_mapping: dict of {pattern: category}
     Example: {"dry": "dry_cough", "wet": "wet_cough", "noise": "non_cough"}
+
+    Destinations are resolved serially (so duplicate renaming is
+    deterministic), then the copies run on max_workers threads
+    (default: 2 per CPU, at most 32).
     """
     print("=" * 70)
     print("AUTOMATIC DATASET ORGANIZATION")
@@ -144,7 +273,7 @@ def organize_dataset_automatic(source_dir: str, output_dir: str, category_mappin
         return
 
     # Find all WAV files
-    wav_files = list(source_path.rglob("*.wav"))
+    wav_files = list(_scandir_wavs(source_path))
     print(f"\nFound {len(wav_files)} WAV files")
 
     # Create output directories
@@ -153,34 +282,36 @@ def organize_dataset_automatic(source_dir: str, output_dir: str, category_mappin
     for category in categories:
         (output_path / category).mkdir(exist_ok=True)
 
+    # Names already taken in each category, for duplicate handling
+    used_names = {category: set(os.listdir(output_path / category)) for category in categories}
+
     # Organize files
     stats = defaultdict(int)
+    jobs = []
+    match_category = _pattern_matcher(category_mapping)
 
     for wav_file in wav_files:
-        filename = wav_file.name.lower()
-
         # Find matching pattern
-        matched = False
-        for pattern, category in category_mapping.items():
-            if pattern.lower() in filename:
-                dest_file = output_path / category / wav_file.name
-
-                # Handle duplicates
-                if dest_file.exists():
-                    stem = dest_file.stem
-                    suffix = dest_file.suffix
-                    counter = 1
-                    while dest_file.exists():
-                        dest_file = output_path / category / f"{stem}_{counter}{suffix}"
-                        counter += 1
-
-                shutil.copy2(wav_file, dest_file)
-                stats[category] += 1
-                matched = True
-                break
-
-        if not matched:
+        category = match_category(wav_file.name.lower())
+        if category is None:
             stats['unmatched'] += 1
+            continue
+
+        # Handle duplicates
+        dest_file = output_path / category / _unique_name(wav_file.name, used_names[category])
+        jobs.append((wav_file, dest_file, category))
+
+    def copy_job(job):
+        src, dest, category = job
+        _fast_copy(src, dest)
+        return category
+
+    if max_workers is None:
+        max_workers = min(32, (os.cpu_count() or 1) * 2)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for category in executor.map(copy_job, jobs):
+            stats[category] += 1
 
     print_stats(stats, categories)
 
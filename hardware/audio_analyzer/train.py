@@ -2,6 +2,7 @@
 Training script for cough detection models
 """
 import os
+import shutil
 import argparse
 import tensorflow as tf
 
@@ -13,6 +14,7 @@ except (ImportError, AttributeError):
 
 from datetime import datetime
 import json
+from typing import Optional
 
 from models import CoughDetectionModel, CoughClassificationModel
 from data_loader import CoughDataset, DetectionDatasetConverter
@@ -27,7 +29,21 @@ from config import (
 class TrainingPipeline:
     """Handles training for both detection and classification models."""
 
-    def __init__(self, data_dir: str, output_dir: str):
+    def __init__(
+        self,
+        data_dir: str,
+        output_dir: str,
+        cache_dir: str = None,
+        mixed_precision: bool = False
+    ):
+        # float16 compute only pays off on a GPU; on CPU it is slower
+        if mixed_precision:
+            if tf.config.list_physical_devices('GPU'):
+                keras.mixed_precision.set_global_policy('mixed_float16')
+                print("✓ Mixed precision training enabled (mixed_float16)")
+            else:
+                print("⚠️  No GPU found, training in float32")
+
         self.data_dir = data_dir
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
@@ -38,7 +54,8 @@ class TrainingPipeline:
             data_dir=data_dir,
             window_size=1.5,
             sample_rate=audio_config.sample_rate,
-            use_augmentation=True
+            use_augmentation=True,
+            cache_dir=cache_dir
         )
 
         # Create or load splits
@@ -56,6 +73,31 @@ class TrainingPipeline:
             )
             self.dataset.save_splits(self.splits, splits_path)
 
+    @staticmethod
+    def _checkpoint_mtime(path: str) -> Optional[int]:
+        """Modification time of path in ns, or None if it does not exist."""
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def _snapshot_best(cls, model, best_model_path: str, model_path: str, mtime_before_fit: Optional[int]):
+        """
+        Copy the best checkpoint written by ModelCheckpoint to model_path
+        instead of serializing the model a second time.
+
+        The checkpoint is only used if this run wrote it, i.e. its mtime
+        changed since mtime_before_fit; a *_best file left over from an
+        earlier run is ignored. Otherwise (e.g. val_loss never improved on
+        its initial value) the current model is saved.
+        """
+        mtime = cls._checkpoint_mtime(best_model_path)
+        if mtime is not None and mtime != mtime_before_fit:
+            shutil.copyfile(best_model_path, model_path)
+        else:
+            model.model.save(model_path)
+
     def train_detection_model(self, epochs: int = None, batch_size: int = None):
         """Train Stage 1: Detection model (binary classification)."""
         print("\n" + "=" * 70)
@@ -92,8 +134,8 @@ class TrainingPipeline:
 
         # Callbacks
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        model_path = os.path.join(self.output_dir, f'detection_model_{timestamp}.h5')
-        best_model_path = os.path.join(self.output_dir, 'detection_model_best.h5')
+        model_path = os.path.join(self.output_dir, f'detection_model_{timestamp}.keras')
+        best_model_path = os.path.join(self.output_dir, 'detection_model_best.keras')
         log_dir = os.path.join(self.output_dir, 'logs', 'detection', timestamp)
 
         callbacks = [
@@ -125,6 +167,7 @@ class TrainingPipeline:
 
         # Train
         print(f"\nTraining for {epochs} epochs...")
+        best_mtime_before_fit = self._checkpoint_mtime(best_model_path)
         history = model.model.fit(
             train_ds,
             validation_data=val_ds,
@@ -133,8 +176,8 @@ class TrainingPipeline:
             verbose=1
         )
 
-        # Save final model
-        model.model.save(model_path)
+        # Keep a timestamped copy of this run's best checkpoint
+        self._snapshot_best(model, best_model_path, model_path, best_mtime_before_fit)
         print(f"\nModel saved to {model_path}")
         print(f"Best model saved to {best_model_path}")
 
@@ -174,22 +217,16 @@ class TrainingPipeline:
             self.splits['train'],
             batch_size=batch_size,
             shuffle=True,
-            augment=True
+            augment=True,
+            one_hot_depth=classification_config.num_bins
         )
 
         val_ds = self.dataset.create_tf_dataset(
             self.splits['val'],
             batch_size=batch_size,
             shuffle=False,
-            augment=False
-        )
-
-        # Convert labels to one-hot
-        train_ds = train_ds.map(
-            lambda x, y: (x, tf.one_hot(y, depth=classification_config.num_bins))
-        )
-        val_ds = val_ds.map(
-            lambda x, y: (x, tf.one_hot(y, depth=classification_config.num_bins))
+            augment=False,
+            one_hot_depth=classification_config.num_bins
         )
 
         # Create model
@@ -200,8 +237,8 @@ class TrainingPipeline:
 
         # Callbacks
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        model_path = os.path.join(self.output_dir, f'classification_model_{timestamp}.h5')
-        best_model_path = os.path.join(self.output_dir, 'classification_model_best.h5')
+        model_path = os.path.join(self.output_dir, f'classification_model_{timestamp}.keras')
+        best_model_path = os.path.join(self.output_dir, 'classification_model_best.keras')
         log_dir = os.path.join(self.output_dir, 'logs', 'classification', timestamp)
 
         callbacks = [
@@ -233,6 +270,7 @@ class TrainingPipeline:
 
         # Train
         print(f"\nTraining for {epochs} epochs...")
+        best_mtime_before_fit = self._checkpoint_mtime(best_model_path)
         history = model.model.fit(
             train_ds,
             validation_data=val_ds,
@@ -241,8 +279,8 @@ class TrainingPipeline:
             verbose=1
         )
 
-        # Save final model
-        model.model.save(model_path)
+        # Keep a timestamped copy of this run's best checkpoint
+        self._snapshot_best(model, best_model_path, model_path, best_mtime_before_fit)
         print(f"\nModel saved to {model_path}")
         print(f"Best model saved to {best_model_path}")
 
@@ -292,11 +330,8 @@ class TrainingPipeline:
             self.splits['test'],
             batch_size=batch_size,
             shuffle=False,
-            augment=False
-        )
-
-        test_ds = test_ds.map(
-            lambda x, y: (x, tf.one_hot(y, depth=classification_config.num_bins))
+            augment=False,
+            one_hot_depth=classification_config.num_bins
         )
 
         classification_results = classification_model.model.evaluate(test_ds, verbose=1)
@@ -319,11 +354,20 @@ def main():
                         help='Batch size (overrides config)')
     parser.add_argument('--evaluate', action='store_true',
                         help='Evaluate on test set after training')
+    parser.add_argument('--cache_dir', type=str, default=None,
+                        help='Cache precomputed MFCCs and packed training audio here')
+    parser.add_argument('--mixed_precision', action='store_true',
+                        help='Train with float16 compute on GPU (mixed_float16)')
 
     args = parser.parse_args()
 
     # Create pipeline
-    pipeline = TrainingPipeline(args.data_dir, args.output_dir)
+    pipeline = TrainingPipeline(
+        args.data_dir,
+        args.output_dir,
+        cache_dir=args.cache_dir,
+        mixed_precision=args.mixed_precision
+    )
 
     detection_model = None
     classification_model = None
@@ -3,7 +3,7 @@
 Collect POSITIVE samples (real coughs).
 """
 import sounddevice as sd
-import pandas as pd
+import soundfile as sf
 from datetime import datetime
 import os
 
@@ -31,9 +31,9 @@ while True:
     audio = sd.rec(int(duration * sample_rate), samplerate=sample_rate, channels=1)
     sd.wait()
 
-    filename = f"audio_analyzer/hardware/AI/cough_dataset/cough/cough_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    df = pd.DataFrame(audio)
-    df.to_csv(filename, header=False, index=False)
+    # 16-bit WAV, the format the training data loader reads
+    filename = f"audio_analyzer/hardware/AI/cough_dataset/cough/cough_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
+    sf.write(filename, audio, sample_rate, subtype='PCM_16')
     print(f"✅ Saved: {filename}\n")
     count += 1
 
@@ -84,8 +84,8 @@ class AudioDetectorWrapper:
     def _create_detector(self) -> LiveCoughDetector:
         """Create and configure the live cough detector."""
         config = DetectionConfig(
-            detection_model_path="audio_analyzer/hardware/AI/models/detection_model_best.h5",
-            classification_model_path="audio_analyzer/hardware/AI/models/classification_model_best.h5",
+            detection_model_path="audio_analyzer/hardware/AI/models/detection_model_best.keras",
+            classification_model_path="audio_analyzer/hardware/AI/models/classification_model_best.keras",
             detection_confidence=0.7,
             use_energy_prefilter=True,
             save_detections=True,
@@ -104,11 +104,8 @@ class AudioDetectorWrapper:
             original_print = print
 
             # Run original detection in a modified way
-            detection_samples = int(detector.config.detection_window * detector.config.sample_rate)
-            hop_samples = int(detector.config.hop_length * detector.config.sample_rate)
-            hop_blocks = max(1, int(hop_samples / detector.config.block_size))
-
-            blocks_waited = 0
+            detector._pin_detection_thread()
+            detection_samples = detector._detection_samples
 
             print("\n" + "=" * 70)
             print("🎤 AUDIO DETECTION ACTIVE (Integrated with Simulator)")
@@ -119,46 +116,30 @@ class AudioDetectorWrapper:
             print("=" * 70 + "\n")
 
             while detector.is_running:
-                # Wait for hop duration
-                if blocks_waited < hop_blocks:
-                    time.sleep(0.1)
-                    blocks_waited += 1
+                # Wait for the next hop of audio
+                if not detector._wait_for_hop():
                     continue
 
-                blocks_waited = 0
-
-                # Get current buffer
-                with detector.buffer_lock:
-                    if len(detector.display_buffer) < 1:
-                        continue
-                    buffer_copy = list(detector.display_buffer)
-
-                # Concatenate buffer
-                full_buffer = detector.np.concatenate(buffer_copy)
-
-                # Get detection window
-                if len(full_buffer) < detection_samples:
+                # Snapshot the write position so the energy check and the
+                # window cover the same samples
+                end_idx = detector._frame_aligned_end()
+                if end_idx < detection_samples:
                     continue
 
-                window = full_buffer[-detection_samples:]
-
                 # Update statistics
                 detector.total_windows_processed += 1
 
                 # Energy pre-filter
-                if not detector._energy_prefilter(window):
-                    print(".", end="", flush=True)
+                if not detector._energy_prefilter(detection_samples, end_idx):
+                    detector._tick()
                     continue
 
-                # Extract MFCC features
-                try:
-                    features = detector.extractor.extract_normalized(
-                        window,
-                        sr=detector.config.sample_rate
-                    )
+                # Get detection window (latest samples from the ring buffer)
+                window = detector.read_latest(detection_samples, end_idx, out=detector._window_buf)
 
-                    # Run neural network pipeline
-                    result = detector.pipeline.predict(features)
+                # Extract MFCC features and run neural network pipeline
+                try:
+                    result = detector._predict_window(window, end_idx)
 
                     # Check if cough detected
                     if result['is_cough']:
@@ -195,14 +176,13 @@ class AudioDetectorWrapper:
                         # Save detection
                         if detector.config.save_detections:
                             detector.save_queue.put({
-                                'audio': window,
-                                'features': features,
+                                'audio': window.copy(),
                                 'result': result,
                                 'timestamp': time.time()
                             })
 
                     else:
-                        print(".", end="", flush=True)
+                        detector._tick()
 
                 except Exception as e:
                     print(f"\nError in detection: {e}")
@@ -210,7 +190,6 @@ class AudioDetectorWrapper:
 
         # Replace detection loop
         detector._detection_loop = detection_loop_with_callback
-        detector.np = __import__('numpy')  # Add numpy reference
 
         return detector
 
@@ -1,12 +1,12 @@
 import sounddevice as sd
 from dataclasses import dataclass
 import matplotlib.pyplot as plt
-from collections import deque
 import numpy as np
 import math
 from sounddevice import CallbackFlags
 from ctypes import Structure
 import pandas as pd
+import soundfile as sf
 import time
 import os
 import threading
@@ -30,8 +30,16 @@ MANUAL_CAPTURE_MODE = False
 
 
 total_samples = AudioConfig.sample_rate * AudioConfig.audio_window
-deque_maxlen_block = math.ceil(total_samples / AudioConfig.block_size)
-display_buffer = deque(maxlen=deque_maxlen_block)
+
+# Preallocated ring buffer holding the last `total_samples` samples. The
+# callback copies each block in place, so nothing is allocated per block.
+display_buffer = np.zeros(total_samples, dtype=np.float32)
+write_idx = 0
+samples_filled = 0
+
+# Running sum of squares over display_buffer, so the window RMS is updated
+# in O(block_size) per callback instead of rescanning the window
+window_sumsq = 0.0
 
 save_queue = queue.Queue()
 buffer_lock = threading.Lock()
@@ -52,12 +60,11 @@ def save_worker():
                 break
 
             data, prefix = item
-            filename = f"{prefix}_time{int(time.time())}.csv"
+            filename = f"{prefix}_time{int(time.time())}.wav"
             filepath = os.path.join(SAVE_DIR, filename)
 
             print(f"\nWorker saving to {filepath}...")
-            df = pd.DataFrame(data)
-            df.to_csv(filepath, header=False, index=False)
+            sf.write(filepath, data.astype(np.float32), AudioConfig.sample_rate, subtype='FLOAT')
             print(f"Worker finished saving {filepath}.")
 
             # If this is an RMS event, append to notes CSV
@@ -95,10 +102,54 @@ def append_to_notes_csv(filename):
         # Save back to CSV with proper formatting
         notes_df.to_csv(NOTES_CSV_PATH, index=False)
         print(f"Updated notes.csv with new entry: {filename}")
-        display_buffer.clear()
+        clear_buffer()
     except Exception as e:
         print(f"Error appending to notes.csv: {e}")
 
+def clear_buffer():
+    """Empty the rolling buffer and reset its running sum of squares."""
+    global write_idx, samples_filled, window_sumsq
+    with buffer_lock:
+        display_buffer[:] = 0
+        write_idx = 0
+        samples_filled = 0
+        window_sumsq = 0.0
+
+def snapshot_buffer() -> np.ndarray:
+    """Return a chronological copy of the samples currently buffered."""
+    with buffer_lock:
+        if samples_filled < total_samples:
+            return display_buffer[:write_idx].copy()
+        return np.concatenate((display_buffer[write_idx:], display_buffer[:write_idx]))
+
+def _sumsq(x: np.ndarray) -> float:
+    """Sum of squares of x, accumulated in float64."""
+    return float(np.einsum('i,i->', x, x, dtype=np.float64))
+
+def _ring_write(block: np.ndarray) -> None:
+    """Copy a block into the ring buffer (caller holds buffer_lock)."""
+    global write_idx, samples_filled, window_sumsq
+    n = len(block)
+    end = write_idx + n
+    if end <= total_samples:
+        old = display_buffer[write_idx:end]
+        window_sumsq += _sumsq(block) - _sumsq(old)
+        display_buffer[write_idx:end] = block
+    else:
+        # Wrap around: split the block across the end and start of the ring
+        k = total_samples - write_idx
+        head, tail = display_buffer[write_idx:], display_buffer[:n - k]
+        window_sumsq += _sumsq(block) - _sumsq(head) - _sumsq(tail)
+        head[:] = block[:k]
+        tail[:] = block[k:]
+    window_sumsq = max(window_sumsq, 0.0)
+    if end >= total_samples:
+        # Wrapped: resync with an exact sum once per pass over the ring, so
+        # rounding in the running updates cannot build up over a session
+        window_sumsq = _sumsq(display_buffer)
+    write_idx = end % total_samples
+    samples_filled = min(samples_filled + n, total_samples)
+
 def audio_callback(indata: np.array, frames: int, time: Structure, status: CallbackFlags) -> None:
     """
     Callback function for sound device. Must be FAST.
@@ -107,20 +158,18 @@ def audio_callback(indata: np.array, frames: int, time: Structure, status: Callb
         print(status)
 
     with buffer_lock:
-        display_buffer.append(indata.flatten())
-        if len(display_buffer) < display_buffer.maxlen:
+        _ring_write(indata[:, 0])
+        if samples_filled < total_samples:
             return
-        buffer_list_copy = list(display_buffer)
+        rms = math.sqrt(window_sumsq / total_samples)
 
-    full_buffer = np.concatenate(buffer_list_copy)
-    window_buffered = full_buffer[-total_samples:]
-
-    rms = np.sqrt(np.mean(window_buffered**2))
     print(f"Current RMS ({AudioConfig.audio_window}s window): {rms:.4f}", end='\r')
 
     if not MANUAL_CAPTURE_MODE:
         if rms > RMS_THRESHOLD:
             print(f"\n>>> POTENTIAL EVENT detected! RMS: {rms:.4f} <<<")
+            # Only materialize the contiguous window when there is something to save
+            window_buffered = snapshot_buffer()
             save_queue.put((window_buffered, "rms_event"))
 
 def on_press(key):
@@ -132,14 +181,12 @@ def on_press(key):
         if key.char == 's':
             print("\n's' pressed! Queuing current buffer for manual save...")
             
-            with buffer_lock:
-                buffer_list_copy = list(display_buffer)
+            full_manual_buffer = snapshot_buffer()
             
-            if not buffer_list_copy:
+            if len(full_manual_buffer) == 0:
                 print("Buffer is empty, nothing to save.")
                 return
 
-            full_manual_buffer = np.concatenate(buffer_list_copy)
             # Save the *entire* buffer at the moment 's' was pressed
             save_queue.put((full_manual_buffer, "manual_save"))
 
@@ -204,11 +251,9 @@ finally:
 
     print("Plotting the last captured audio from the buffer...")
     
-    final_buffer_list = list(display_buffer)
+    full_buffer = snapshot_buffer()
 
-    if final_buffer_list:
-        full_buffer = np.concatenate(final_buffer_list)
-        
+    if len(full_buffer) > 0:
         duration_s = len(full_buffer) / AudioConfig.sample_rate
         time_axis = np.linspace(0., duration_s, len(full_buffer))
         
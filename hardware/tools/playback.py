@@ -1,19 +1,23 @@
 import sounddevice as sd
 import numpy as np
 import pandas as pd
+import soundfile as sf
 
 
 sample_rate: int = 8000
 dtype: str = 'float32'
-csv_filename: str = 'my_audio.csv' # put relative path here
+csv_filename: str = 'my_audio.csv' # put relative path here (.csv or .wav)
 
 
 print(f"Loading audio from {csv_filename}...")
 try:
-    my_audio_data = pd.read_csv(
-        csv_filename, 
-        header=None
-    ).iloc[:, 0].to_numpy(dtype=dtype)
+    if csv_filename.lower().endswith('.wav'):
+        my_audio_data, sample_rate = sf.read(csv_filename, dtype=dtype)
+    else:
+        my_audio_data = pd.read_csv(
+            csv_filename, 
+            header=None
+        ).iloc[:, 0].to_numpy(dtype=dtype)
 
     print(f"Loaded {my_audio_data.shape[0]} samples.")
     print("Playing audio...")
@@ -6,6 +6,7 @@ import numpy as np
 import math
 from scipy import signal
 import pandas as pd
+import soundfile as sf
 import time
 import os
 import threading
@@ -317,12 +318,11 @@ def save_worker():
             
             # Generate filename
             timestamp_str = time.strftime("%Y%m%d_%H%M%S", time.localtime(metadata['timestamp']))
-            filename = f"event_{timestamp_str}.csv"
+            filename = f"event_{timestamp_str}.wav"
             filepath = os.path.join(SAVE_DIR, filename)
             
             # Save audio
-            df = pd.DataFrame(audio_data)
-            df.to_csv(filepath, header=False, index=False)
+            sf.write(filepath, audio_data.astype(np.float32), config.sample_rate, subtype='FLOAT')
             
             # Update metadata CSV
             metadata_entry = pd.DataFrame([{